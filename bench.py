@@ -0,0 +1,245 @@
+'''Benchmarks of the henoi engine and the renderer, with regression tracking'''
+from argparse import ArgumentParser
+from collections import deque
+from io import BytesIO, StringIO
+import json
+import math
+import platform
+import sys
+from time import perf_counter_ns
+import tracemalloc
+from typing import Any, Callable
+from hanoilib import Movement, Stack, Tower, _move, _moves, _new_tower, _stepfy
+from hanoilib._show import draw_tower
+from hanoilib.display import Show, ShowConfiguration
+from hanoilib.record import AsciicastWriter, record
+
+
+Job = Callable[..., Any]
+Case = Callable[[int], tuple[Job, int] | tuple[Job, int, Callable[[], Any]]]
+'''level -> (job, units of work[, setup]), the job is timed and reported per unit. '''\
+    '''With setup, each run untimed calls setup and passes what it returns to the job'''
+
+CASES: dict[str, Case] = {}
+
+MAX_UNITS = 100_000
+
+
+def case(name: str) -> Callable[[Case], Case]:
+    '''register a benchmark case'''
+    def register(func: Case) -> Case:
+        CASES[name] = func
+        return func
+    return register
+
+
+def consume(iterator) -> None:
+    '''run an iterator to the end'''
+    deque(iterator, maxlen=0)
+
+
+# PART cases
+
+
+@case('_move')
+def _bench_move(level: int):
+    steps = range(min((1 << level)-1, MAX_UNITS))
+    return lambda: [_move(step, level) for step in steps], len(steps)
+
+
+@case('_moves')
+def _bench_moves(level: int):
+    return lambda: consume(_moves(level)), (1 << level)-1
+
+
+@case('_stepfy')
+def _bench_stepfy(level: int):
+    return lambda: consume(_stepfy([Movement(0, 2)], level, 0)), 1 << (level-1)
+
+
+@case('eval canonical')
+def _bench_eval_canonical(level: int):
+    tower = Tower.new(0, level)
+    return lambda: consume(tower.eval()), (1 << level)-1
+
+
+@case('eval off path')
+def _bench_eval_off_path(level: int):
+    tower = Tower.new(0, level)
+    # the smallest plate goes the wrong way first
+    tower.move(Movement(0, 1 if level & 1 else 2))
+    units = sum(1 for _ in tower.eval())
+    return lambda: consume(tower.eval()), units
+
+
+@case('_new_tower')
+def _bench_new_tower(level: int):
+    step = (1 << level)//3
+    return lambda: _new_tower(step, level), level
+
+
+@case('Stack._check')
+def _bench_check(level: int):
+    plates = list(range(level*1000, 0, -1))
+    return lambda: Stack._check(plates), len(plates)  # pylint: disable=protected-access
+
+
+@case('draw_tower')
+def _bench_draw_tower(level: int):
+    tower = Tower.new((1 << level)//3, level)
+    return lambda: draw_tower(tower), level
+
+
+@case('Show.read_editions')
+def _bench_read_editions(level: int):
+    units = min((1 << level)-1, MAX_UNITS//10)
+
+    def setup() -> Show:
+        show = Show(Tower.new(0, level), ShowConfiguration(eval=True))
+        str(show)
+        return show
+
+    def job(show: Show):
+        for _ in range(units):
+            show.next()
+            show.read_editions()
+    return job, units, setup
+
+
+@case('Show.fast_play')
+def _bench_fast_play(level: int):
+    def job():
+        show = Show(Tower.new(0, level), ShowConfiguration())
+        str(show)
+        show.fast_play(StringIO().write)
+    return job, (1 << level)-1
+
+
+@case('Show.fast_play bytes')
+def _bench_fast_play_bytes(level: int):
+    def job():
+        show = Show(Tower.new(0, level), ShowConfiguration())
+        str(show)
+        show.fast_play(BytesIO().write, binary=True)
+    return job, (1 << level)-1
+
+
+@case('Show.fast_play eval')
+def _bench_fast_play_eval(level: int):
+    def job():
+        show = Show(Tower.new(0, level), ShowConfiguration(eval=True))
+        str(show)
+        show.fast_play(StringIO().write)
+    return job, (1 << level)-1
+
+
+@case('Show.fast_play frames')
+def _bench_fast_play_frames(level: int):
+    def job():
+        show = Show(Tower.new(0, level), ShowConfiguration())
+        str(show)
+        show.fast_play(StringIO().write, fps=60)
+    return job, (1 << level)-1
+
+
+@case('record asciicast')
+def _bench_record(level: int):
+    def job():
+        show = Show(Tower.new(0, level), ShowConfiguration())
+        record(show, AsciicastWriter(StringIO(), 80, 24, timestamp=0), (1 << level)/60)
+    return job, (1 << level)-1
+
+
+# PART runner
+
+
+def measure(name: str, level: int, repeat: int) -> dict[str, Any]:
+    '''time the case (best of repeat) and trace its peak memory'''
+    job, units, *setup = CASES[name](level)
+
+    def args() -> tuple[Any, ...]:
+        return (setup[0](),) if setup else ()
+
+    job(*args())  # warm up caches and imports
+    best = math.inf
+    for _ in range(repeat):
+        prepared = args()
+        start = perf_counter_ns()
+        job(*prepared)
+        spent = perf_counter_ns()-start
+        best = min(best, spent)
+    prepared = args()
+    tracemalloc.start()
+    job(*prepared)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'case': name, 'level': level, 'units': units,
+            'ns_per_unit': best/max(units, 1), 'peak_bytes': peak}
+
+
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]],
+            tolerance: float) -> list[str]:
+    '''return the slowdowns over the tolerance'''
+    base = {(item['case'], item['level']): item for item in baseline}
+    failures = []
+    for item in results:
+        if (old := base.get((item['case'], item['level']))) is None:
+            continue
+        ratio = item['ns_per_unit']/old['ns_per_unit']
+        if ratio > 1+tolerance:
+            failures.append(f"{item['case']} @ level {item['level']}: "
+                            f"{old['ns_per_unit']:.1f} -> {item['ns_per_unit']:.1f} ns/unit "
+                            f"(x{ratio:.2f})")
+    return failures
+
+
+def main() -> int:
+    '''run the benchmarks'''
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('--levels', type=int, nargs='+', default=[8, 12, 16])
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--baseline', default='bench_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown ratio over the baseline')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"case":<22}{"level":>6}{"units":>10}{"ns/unit":>12}{"peak KiB":>12}')
+    for name in args.cases:
+        for level in args.levels:
+            item = measure(name, level, args.repeat)
+            results.append(item)
+            print(f'{name:<22}{level:>6}{item["units"]:>10}'
+                  f'{item["ns_per_unit"]:>12.1f}{item["peak_bytes"]/1024:>12.1f}')
+
+    report = {'python': sys.version, 'platform': platform.platform(), 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f'baseline saved to {args.baseline}')
+        return 0
+
+    try:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+    except FileNotFoundError:
+        # nothing to compare with is a failure too, or regressions would pass unseen
+        print(f'no baseline at {args.baseline}, run with --save-baseline to create one')
+        return 2
+    if failures := compare(results, baseline, args.tolerance):
+        print('\nREGRESSION', *failures, sep='\n  ')
+        return 1
+    print('\nno regression')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+# end
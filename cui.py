@@ -1,13 +1,19 @@
 '''cui henoi'''
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from functools import partial
 # from multiprocessing import Process, Queue, Pipe, connection
-from time import perf_counter, sleep
+from time import perf_counter
 import os
 from sys import stdout
 from typing import Literal
 from colorama import Fore, Back, Cursor
 from hanoilib import HenoiOrderFail, HenoiStepOver, Movement, Tower
+from hanoilib._show import Viewport
 from hanoilib.display import ShowConfiguration, Show
+from hanoilib.output import RawWriter
+from hanoilib.player import KEYS_HELP, play
+from hanoilib.record import record
 from true_false import true_false
 
 # init(autoreset=True)
@@ -15,9 +21,12 @@ from true_false import true_false
 class Handler(ABC):
     '''To handle the environment'''
     config: ShowConfiguration
+    view_mode: bool | None
+    '''whether to draw the tower in a viewport, None for only when it does not fit'''
 
     def __init__(self, configuration: ShowConfiguration | None = None) -> None:
         self.config = configuration or ShowConfiguration()
+        self.view_mode = None
 
     @staticmethod
     def error(log: str) -> Literal[False]:
@@ -31,23 +40,59 @@ class Handler(ABC):
         print(f'{Fore.GREEN}[Info] {log}{Fore.RESET}')
         return True
 
+    def _configure(self, **changes) -> bool:
+        '''change the configuration'''
+        for name, value in changes.items():
+            setattr(self.config, name, value)
+        return True
+
     def eval(self, option: bool) -> bool:
         '''switch whether to show evaluation'''
-        self.config.eval = option
-        return True
+        return self._configure(eval=option)
 
     def width(self, option: str) -> bool:
         '''set the width of the tower'''
         if option in {'auto', 'half', 'full'}:
-            self.config.width = option  # type: ignore
-            return True
+            return self._configure(width=option)
         return self.error(f'no option {option}')
 
     def level(self, option: bool) -> bool:
         '''switch whether to show plate level in the tower'''
-        self.config.show_plate_level = option
+        return self._configure(show_plate_level=option)
+
+    def scroll(self, option: bool) -> bool:
+        '''switch whether to scroll the evaluation in a scroll region, '''\
+            '''the terminal should support left and right margins'''
+        return self._configure(scroll_eval=option)
+
+    def lookahead(self, block: int) -> bool:
+        '''generate block next steps at a time on a thread from the next game, 0 for off'''
+        if block < 0:
+            return self.error('lookahead should not be negative')
+        self.config.lookahead = block
         return True
 
+    def view(self, option: bool | None) -> bool:
+        '''switch whether to draw the tower scaled in a viewport of the terminal, '''\
+            '''None to do so only when the tower does not fit. '''\
+            '''The evaluation is not shown in the viewport'''
+        self.view_mode = option
+        return self._configure(viewport=self._viewport())
+
+    def _viewport(self) -> Viewport | None:
+        '''the viewport to draw the tower in by the mode'''
+        return None
+
+    def raw(self, option: bool) -> bool:
+        '''switch whether to play straight to the terminal, past the buffers of python'''
+        self.config.raw = option
+        return True
+
+    def profile(self, option: bool) -> bool:
+        '''switch whether to profile playing, from the next game'''
+        self.config.profile = option
+        return self.info(f'profiling {"on" if option else "off"} from the next game')
+
     @abstractmethod
     def _show_tower(self) -> bool: ...
 
@@ -67,6 +112,24 @@ class Handler(ABC):
     def next(self) -> bool:
         '''move a step forward automatically'''
 
+    @abstractmethod
+    def view_scroll(self, delta: int) -> bool:
+        '''scroll the viewport down by delta rows (up if negative)'''
+
+    def view_bin(self, plates: int | None) -> bool:
+        '''set the plates drawn in a row of the viewport, None to fit the tower'''
+        if plates is not None and plates < 1:
+            return self.error('plates a row should be positive')
+        if self.config.viewport is None:
+            return self.error('no viewport, turn it on by `view on`')
+        self.config.viewport.bin = plates
+        self.config.viewport.top = 0
+        return self.view_scroll(0)
+
+    @abstractmethod
+    def seek(self, step: int) -> bool:
+        '''jump to the step of the solution'''
+
     @abstractmethod
     def flush(self) -> bool:
         '''flush the screen'''
@@ -76,8 +139,17 @@ class Handler(ABC):
         '''break the game'''
 
     @abstractmethod
-    def play(self, time: float) -> bool:
-        '''auto play the game'''
+    def play(self, time: float, fps: float | None = None) -> bool:
+        '''auto play the game, as fast as possible if time is 0, drawing fps frames a second'''
+
+    @abstractmethod
+    def record(self, path: str, time: float = 10., fps: float = 30.) -> bool:
+        '''record the game played to the end in time seconds to an asciicast file, '''\
+            '''gzipped if the path ends with .gz'''
+
+    @abstractmethod
+    def stats(self, path: str | None = None) -> bool:
+        '''show the profile of playing, and dump it as json to the path'''
 
     def match_command(self, cmd: str) -> bool:
         '''match the command line and do the job'''
@@ -95,18 +167,16 @@ class Handler(ABC):
                 return self.next()
             case 'eval', option:
                 if (arg := true_false(option)) is not None:
-                    self.eval(arg)
-                    self.flush()
-                    return True
+                    return self.eval(arg)
                 return self.error(f'No such arguement {option}')
             case 'width', option:
                 return self.width(option)
             case 'level', option:
                 if (arg := true_false(option)) is not None:
-                    self.level(arg)
-                    self.flush()
-                    return True
+                    return self.level(arg)
                 return self.error(f'No such arguement {option}')
+            case 'seek', step:
+                return self.seek(int(step))
             case 'flush', :
                 return self.flush()
             case 'break', :
@@ -115,19 +185,60 @@ class Handler(ABC):
                 return self.play(10)
             case 'play', time:
                 return self.play(int(time))
+            case 'play', time, fps:
+                return self.play(int(time), float(fps))
+            case 'scroll', option:
+                if (arg := true_false(option)) is not None:
+                    return self.scroll(arg)
+                return self.error(f'No such arguement {option}')
+            case 'view', 'auto':
+                return self.view(None)
+            case 'view', ('up' | 'down') as way, *rows if len(rows) <= 1:
+                delta = int(rows[0]) if rows else 1
+                return self.view_scroll(delta if way == 'down' else -delta)
+            case 'view', 'bin', 'auto':
+                return self.view_bin(None)
+            case 'view', 'bin', plates:
+                return self.view_bin(int(plates))
+            case 'view', option:
+                if (arg := true_false(option)) is not None:
+                    return self.view(arg)
+                return self.error(f'No such arguement {option}')
+            case 'lookahead', block:
+                return self.lookahead(int(block))
+            case 'raw', option:
+                if (arg := true_false(option)) is not None:
+                    return self.raw(arg)
+                return self.error(f'No such arguement {option}')
+            case 'profile', option:
+                if (arg := true_false(option)) is not None:
+                    return self.profile(arg)
+                return self.error(f'No such arguement {option}')
+            case 'record', path:
+                return self.record(path)
+            case 'record', path, time:
+                return self.record(path, float(time))
+            case 'record', path, time, fps:
+                return self.record(path, float(time), float(fps))
+            case 'stats', :
+                return self.stats()
+            case 'stats', path:
+                return self.stats(path)
             case _:
                 return self.error('no such cmd')
 
 
 class DefaultHandler(Handler):
     '''Default handler'''
-    show: Show | None
+    show: Show | None = None
 
     def help(self) -> bool:
         return False
 
     def game(self, level: int) -> bool:
+        self._drop_show()
         self.show = Show(Tower.new(0, level), self.config)
+        self.config.viewport = self._viewport()
         self._show_tower()
 
         return True
@@ -139,7 +250,7 @@ class DefaultHandler(Handler):
             self.show.move(movement)
         except HenoiOrderFail:
             return self.error('invalid movement')
-        print(self.show.read_editions(), end='')
+        self._print_editions()
 
         return True
 
@@ -149,11 +260,54 @@ class DefaultHandler(Handler):
         try:
             self.show.next()
         except HenoiStepOver:
+            self.show.close()
             return self.error('already done')
         else:
             return True
         finally:
+            self._print_editions()
+
+    def _configure(self, **changes) -> bool:
+        if self.show is None:
+            return super()._configure(**changes)
+        # only what changed is redrawn
+        print(self.show.configure(**changes), end='', flush=True)
+        return True
+
+    def seek(self, step: int) -> bool:
+        if self.show is None:
+            return self.error('no tower to seek')
+        try:
+            print(self.show.seek(step), end='', flush=True)
+        except HenoiStepOver:
+            return self.error('over than all step')
+        return True
+
+    def _viewport(self) -> Viewport | None:
+        if self.show is None or self.view_mode is False:
+            return None
+        # the names, the spliter and the border, and the prompt with a line of info
+        reserved_rows = 2 + (self.config.border << 1) + 2
+        reserved_columns = self.config.border << 2
+        viewport = Viewport.for_terminal(reserved_rows, reserved_columns)
+        height, unit_width, _ = self.show.tower_info
+        width = unit_width*3 + (16 if self.config.eval else 0)
+        if self.view_mode is None and height <= viewport.rows and width <= viewport.columns:
+            return None
+        return viewport
+
+    def view_scroll(self, delta: int) -> bool:
+        if self.show is None or self.config.viewport is None:
+            return self.error('no viewport to scroll')
+        print(self.show.scroll(delta), end='', flush=True)
+        return True
+
+    def _print_editions(self) -> None:
+        assert self.show is not None
+        if self.show.stats is None:
             print(self.show.read_editions(), end='')
+        else:
+            self.show.stats.emit(partial(print, end=''), self.show.read_editions())
 
     def flush(self) -> bool:
         try:
@@ -164,24 +318,50 @@ class DefaultHandler(Handler):
 
     def break_(self) -> bool:
         os.system('cls')
-        self.show = None
+        self._drop_show()
         return True
 
-    def play(self, time: float) -> bool:
+    def _drop_show(self) -> None:
+        '''stop the threads of the show and forget it'''
+        if self.show is not None:
+            self.show.close()
+            self.show = None
+
+    def _close_if_done(self) -> None:
+        '''stop the threads of the show when no step is left'''
+        if self.show is not None and not self.show.steps_left():
+            self.show.close()
+
+    def play(self, time: float, fps: float | None = None) -> bool:
         if self.show is None:
             return self.error('no tower to play')
+        stats = self.show.stats
         try:
             time = float(time)
             time_start = perf_counter()
-            if time:
-                while self.next():
-                    sleep(5/time)
-            else:
-                self.show.fast_play(stdout.write)
+            with nullcontext() if stats is None else stats.session():
+                if time:
+                    self.info(KEYS_HELP)
+                    out = RawWriter(stdout.fileno()) if self.config.raw else stdout
+                    if stats is not None:
+                        out = _CountedOutput(out, stats)
+                    report = play(self.show, out, time/5)
+                else:
+                    # the escapes are ready-made bytes, written past the text layer
+                    stdout.flush()
+                    out = RawWriter(stdout.fileno()) if self.config.raw else stdout.buffer
+                    try:
+                        self.show.fast_play(out.write if stats is None else stats.writer(out.write),
+                                            fps=fps, binary=True)
+                    finally:
+                        out.flush()
             time_end = perf_counter()
+            self._close_if_done()
             print("\033[F\033[K", end='')
             self.info('finish')
             self.info(f'time: {time_end-time_start:.3f}s')
+            if time:
+                self.info(str(report))
             return True
         except ValueError:
             return self.error('time should be int or float')
@@ -189,6 +369,29 @@ class DefaultHandler(Handler):
             self.info('stop going')
             return False
 
+    def record(self, path: str, time: float = 10., fps: float = 30.) -> bool:
+        if self.show is None:
+            return self.error('no tower to record')
+        if time <= 0 or fps <= 0:
+            return self.error('time and fps should be positive')
+        try:
+            report = record(self.show, path, max(self.show.steps_left(), 1)/time, fps=fps)
+        except OSError as exc:
+            return self.error(f'cannot record to {path}: {exc.strerror}')
+        self._close_if_done()
+        return self.info(str(report))
+
+    def stats(self, path: str | None = None) -> bool:
+        if self.show is None:
+            return self.error('no game to profile')
+        if self.show.stats is None:
+            return self.error('profiling is off, turn it on by `profile on` and start a new game')
+        print(self.show.stats.report())
+        if path is not None:
+            self.show.stats.dump(path)
+            return self.info(f'dumped to {path}')
+        return True
+
     def _show_tower(self) -> bool:
         if self.show is None:
             self.error('no tower to do so')
@@ -198,6 +401,13 @@ class DefaultHandler(Handler):
         return True
 
 
+class _CountedOutput:
+    '''An output counting the time and the bytes of writes into the stats'''
+    def __init__(self, out, stats) -> None:
+        self.write = stats.writer(out.write)
+        self.flush = out.flush
+
+
 SEP = '-'*32
 
 
@@ -215,7 +425,7 @@ def main():
             while True:
                 if (t_f := true_false(leave)) is True:
                     os.system('cls')
-                    print(f'{Fore.BLUE}Thank for using the program, good bye!')
+                    print(f'{Fore.BLUE}Thank for using the program, good bye!{Fore.RESET}')
                     return
                 if t_f is False:
                     print(f'{Fore.CYAN}Do you want to leave?\n{SEP}{Fore.RESET}')
@@ -237,6 +447,6 @@ if __name__ == '__main__':
         # print('\n','\033[K\033[F'*3, sep='')
         # continue
         os.system('cls')
-        print(f'{Fore.BLUE}\nThank for using the program, good bye!')
+        print(f'{Fore.BLUE}\nThank for using the program, good bye!{Fore.RESET}')
 
 # end
@@ -2,8 +2,11 @@
 
 # PART import
 
-from collections import deque
+from array import array
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import compress
 from typing import Generator, Iterable, Iterator, Literal, Protocol, Self, Type, overload
 
 
@@ -86,6 +89,14 @@ class Stack(deque[Plate]):
         super().__init__(plates, maxlen=maxlen)
         self.name = name
 
+    @classmethod
+    def trusted(cls, plates: Iterable[Plate], name: str = '', maxlen: int | None = None) -> Self:
+        '''create a stack without checking the order, for plates from the library itself'''
+        self = cls.__new__(cls)
+        deque.__init__(self, plates, maxlen)
+        self.name = name
+        return self
+
     @staticmethod
     def _check(plates: Iterable[Plate]) -> None:
         if not plates:
@@ -132,12 +143,80 @@ class StackEnd(Stack):
     _position = 2
 
 
+class ArrayStack(array):
+    '''A Stack keeping plates as unsigned ints in an array, without Plate objects'''
+    name: str
+
+    _position: Position
+
+    def __new__(cls, plates: Iterable[int] | None = None,
+                name: str = '', maxlen: int | None = None) -> Self:
+        # pylint: disable=unused-argument
+        return super().__new__(cls, 'I', plates or ())
+
+    def __init__(self, plates: Iterable[int] | None = None,
+                 name: str = '', maxlen: int | None = None) -> None:
+        # pylint: disable=unused-argument, super-init-not-called
+        Stack._check(self)
+        self.name = name
+
+    @classmethod
+    def trusted(cls, plates: Iterable[int], name: str = '', maxlen: int | None = None) -> Self:
+        '''create a stack without checking the order, for plates from the library itself'''
+        # pylint: disable=unused-argument
+        self = super().__new__(cls, 'I', plates)
+        self.name = name
+        return self
+
+    def push(self, plate: int) -> None:
+        '''push a plate to back.'''
+        if self and plate >= self[-1]:
+            raise HenoiOrderFail(f'{plate} >= {self[-1]}')
+        self.append(plate)
+
+    def clear(self) -> None:
+        '''remove all plates'''
+        del self[:]
+
+    def copy(self) -> Self:
+        '''copy a stack'''
+        return self.trusted(self, self.name)
+
+    def __repr__(self) -> str:
+        return f'<{self.name} : {self.__class__.__name__}({self.tolist()})>'
+
+
+class ArrayStackStart(ArrayStack):
+    '''ArrayStack in start (Position a)'''
+    name = 'start'
+    _position = 0
+
+
+class ArrayStackTemp(ArrayStack):
+    '''ArrayStack in middle (Position b)'''
+    name = 'temporary'
+    _position = 1
+
+
+class ArrayStackEnd(ArrayStack):
+    '''ArrayStack in the end (Position c)'''
+    name = 'end'
+    _position = 2
+
+
 class Movement(tuple[Position, Position]):
-    '''Movement: which stack is poped, which is pushed'''
+    '''Movement: which stack is poped, which is pushed. '''\
+        '''The six movements between different stacks are interned, '''\
+        '''so the same one is always the same object (subclasses are not interned).'''
 
     def __new__(cls: type[Self], from_: Position, to: Position) -> Self:
+        if cls is Movement and (move := INTERNED_MOVES.get((from_, to))) is not None:
+            return move  # type: ignore
         return super().__new__(cls, (from_, to))
 
+    def __getnewargs__(self) -> tuple[Position, Position]:
+        return self[0], self[1]
+
     def __repr__(self) -> str:
         return f'{Pos._to_chr(self[0])} -> {Pos._to_chr(self[1])}'
 
@@ -145,6 +224,19 @@ class Movement(tuple[Position, Position]):
         '''opposite directed movement'''
         return Movement(self[1], self[0])
 
+    @property
+    def code(self) -> int:
+        '''packed code of the movement, (a, b) -> 0, (a, c) -> 1, ... (c, b) -> 5'''
+        try:
+            return MOVE_CODES[self]
+        except KeyError as exc:
+            raise HenoiImposible('no such movement') from exc
+
+    @staticmethod
+    def from_code(code: int) -> 'Movement':
+        '''the movement of a packed code'''
+        return CODE_MOVES[code]
+
     @staticmethod
     def eval(step: int, level: int, *,
              start_pos: Position = 0, end_pos: Position = 2) -> 'Movement':
@@ -161,6 +253,19 @@ class Movement(tuple[Position, Position]):
             raise HenoiImposible('no such movement') from exc
 
 
+CODE_PAIRS: tuple[tuple[Position, Position], ...] = (
+    (0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1)
+)
+
+INTERNED_MOVES: dict[tuple[int, int], Movement] = {
+    pair: tuple.__new__(Movement, pair) for pair in CODE_PAIRS
+}
+
+CODE_MOVES: tuple[Movement, ...] = tuple(INTERNED_MOVES[pair] for pair in CODE_PAIRS)
+
+MOVE_CODES: dict[tuple[int, int], int] = {move: code for code, move in enumerate(CODE_MOVES)}
+
+
 class Positions(Protocol):
     '''a list of Position'''
     @overload
@@ -229,30 +334,86 @@ class Tower:
 
     def eval(self) -> 'MoveGen':
         '''eviluate next steps'''
-        tower_tall = len(self.start)+len(self.temp)+len(self.end)
-        for order, pos in enumerate(self.plates_pos):
-            if pos != 2:
-                index = order
-                want_p = 2
-                break
-        else:
-            raise HenoiStepOver('finish')
-        if all((a == b) for a, b in zip(self.plates_pos, self.plates_pos[1:])):
-            return _moves(tower_tall, start_pos=self.plates_pos[0], end_pos=2)
-        move_list: list[Movement] = []
-        add_move = move_list.append
-        for order, pos in enumerate(self.plates_pos[index:], start=index):
-            if ((not self[want_p]) or
-                    ((tower_tall - order) < self[want_p][-1])
-                ) \
-                    and (tower_tall - order) == self[pos][-1]:
-                add_move(Movement(pos, want_p))
-                break
-            add_move(Movement(pos, want_p))
-            if (anthor := _other(pos, want_p)) is not None:
-                want_p = anthor
-        move_list.reverse()
-        return _stepfy(move_list, tower_tall, index)
+        positions = bytes(self.plates_pos)
+        return _plan_moves(positions, EVAL_CACHE.plan(positions))
+
+    def eval_after(self, movement: Movement) -> 'MoveGen':
+        '''eviluate next steps as if the movement were made, the tower is not changed. '''\
+            '''The plan is updated from the moved plate down instead of made again'''
+        plate = self[movement[0]][-1]
+        if (stack_to := self[movement[1]]) and stack_to[-1] < plate:
+            raise HenoiOrderFail(f'{plate} >= {stack_to[-1]}')
+        positions = bytes(self.plates_pos)
+        wants = EVAL_CACHE.plan(positions)
+        order = len(positions)-plate
+        after = bytearray(positions)
+        after[order] = movement[1]
+        positions = bytes(after)
+        return _plan_moves(positions, EVAL_CACHE.plan(positions, wants, order))
+
+    def steps_left(self) -> int:
+        '''the steps eval takes to the end, a plate not where wanted takes a step '''\
+            '''and the moves of the plates above it'''
+        positions = bytes(self.plates_pos)
+        level = len(positions)
+        return sum(1 << (level-1-index) for index, (pos, want)
+                   in enumerate(zip(positions, EVAL_CACHE.plan(positions))) if pos != want)
+
+    def step_index(self, *, start_pos: Position = 0, end_pos: Position = 2) -> int | None:
+        '''the step where the tower is on the way from start_pos to end_pos, '''\
+            '''None if it is not on the way. The inverse of Tower.new'''
+        temp_pos: Position = (start_pos | end_pos) ^ 3  # type: ignore
+        step = 0
+        for pos in self.plates_pos:
+            # the larger plate has moved iff it is on end_pos,
+            # then the rest plates go from start_pos to temp_pos or from temp_pos to end_pos
+            step <<= 1
+            if pos == start_pos:
+                end_pos, temp_pos = temp_pos, end_pos
+            elif pos == end_pos:
+                step |= 1
+                start_pos, temp_pos = temp_pos, start_pos
+            else:
+                return None
+        return step
+
+    def seek(self, step: int, *, start_pos: Position = 0, end_pos: Position = 2) -> list[Plate]:
+        '''set the tower to the step from start_pos to end_pos, '''\
+            '''return the plates changed, from the largest one'''
+        level = len(self.plates_pos)
+        target = positions_at(step, level, start_pos=start_pos, end_pos=end_pos)
+        plates_pos = self.plates_pos
+        changed = [index for index, (old, new) in enumerate(zip(plates_pos, target))
+                   if old != new]
+        stacks_changed: set[int] = set()
+        for index in changed:
+            stacks_changed.add(plates_pos[index])
+            stacks_changed.add(target[index])
+            plates_pos[index] = target[index]  # type: ignore
+        for pos in stacks_changed:
+            stack = self._stacks[pos]
+            stack.clear()
+            stack.extend(Plate(level-index) for index, p in enumerate(target) if p == pos)
+        return [Plate(level-index) for index in changed]
+
+    def advance(self, steps: int, *, start_pos: Position = 0, end_pos: Position = 2) -> list[Plate]:
+        '''jump steps forward (or backward if negative) on the way from start_pos to end_pos, '''\
+            '''return the plates changed, from the largest one'''
+        step = self.step_index(start_pos=start_pos, end_pos=end_pos)
+        if step is None:
+            raise HenoiImposible('the tower is not on the way')
+        return self.seek(step+steps, start_pos=start_pos, end_pos=end_pos)
+
+    @classmethod
+    def trusted(cls, stacks: tuple[Stack, Stack, Stack], plates_pos: Positions,
+                name: str = '') -> Self:
+        '''create a tower without checking, plates_pos should match the stacks'''
+        self = cls.__new__(cls)
+        self.start, self.temp, self.end = stacks  # type: ignore
+        self._stacks = stacks
+        self.name = name
+        self.plates_pos = plates_pos
+        return self
 
     # def show_dot(self) -> str:
     #     high = max(len(self.start), len(self.temp), len(self.end))
@@ -279,11 +440,13 @@ class Tower:
     @staticmethod
     def new(step: int, level: int, *, start_pos: Position = 0, end_pos: Position = 2,
             tower_name: str = '',
-            stack_names: tuple[str, str, str] = ('start', 'temporary', 'end')) -> 'Tower':
-        '''create a tower.'''
+            stack_names: tuple[str, str, str] = ('start', 'temporary', 'end'),
+            array_stack: bool = False) -> 'Tower':
+        '''create a tower. array_stack to use ArrayStack instead of Stack'''
         step_posible(step, level)
         return _new_tower(step, level, start_pos=start_pos, end_pos=end_pos,
-                          tower_name=tower_name, stack_names=stack_names)
+                          tower_name=tower_name, stack_names=stack_names,
+                          array_stack=array_stack)
 
 
 # PART helper
@@ -298,6 +461,8 @@ def match_stack_type(p: Position, /) -> Type[Stack]:
 
 STACK_TYPES = (StackStart, StackTemp, StackEnd)
 
+ARRAY_STACK_TYPES = (ArrayStackStart, ArrayStackTemp, ArrayStackEnd)
+
 MOVES: tuple[tuple[Position, Position], ...] = (
     (0, 1), (2, 0), (1, 2)
 )
@@ -352,75 +517,162 @@ def _stepfy(expected_moves: list[Movement],
         if temp_pos == end_pos:
             continue
         yield move
-
-        start_pos: Position = (end_pos | temp_pos) ^ 3  # type: ignore
-        if index & 1:
-            temp_pos, end_pos = end_pos, temp_pos
-        states = (
-            Movement(start_pos, temp_pos),
-            Movement(end_pos, start_pos),
-            Movement(temp_pos, end_pos)
-        )
-        states_rev = (
-            Movement(temp_pos, start_pos),
-            Movement(start_pos, end_pos),
-            Movement(end_pos, temp_pos)
-        )
-        for step in range((1 << index)-1):
-            if bit_length(step+1 ^ step) & 1:  # right most 0 position is odd
-                yield states[step % 3]
-            else:
-                yield states_rev[step % 3]
+        # the smaller plates follow the move as a whole tower
+        start_pos = (end_pos | temp_pos) ^ 3
+        yield from _moves(index, start_pos=start_pos, end_pos=end_pos)  # type: ignore
 
 
 def _change_pos(a: Position, b: Position, c: Position, *positions: Position) -> list[Position]:
     # pylint: disable=invalid-name
     return [a if pos == 0 else b if pos == 1 else c for pos in positions]
 
+# PART plan
+# The plan wants each plate (from the largest) on a position: the largest on the end,
+# and a smaller one on the same position as the larger one if it is there already,
+# else on the third position, out of the way of the larger one.
+
+
+def _fill_wants(positions: bytes, wants: bytearray, order: int) -> None:
+    '''fill the wanted positions of the plates smaller than the one at order'''
+    want = wants[order]
+    for index in range(order, len(positions)-1):
+        if (pos := positions[index]) != want:
+            want = (pos | want) ^ 3
+        wants[index+1] = want
+
+
+class PlanCache(OrderedDict[bytes, bytes]):
+    '''Wanted positions of the plates keyed by plates_pos, the least recently used are dropped'''
+    maxsize: int
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        super().__init__()
+        self.maxsize = maxsize
+
+    def plan(self, positions: bytes, base: bytes | None = None, order: int = 0) -> bytes:
+        '''the wanted positions, from the wanted positions of a tower (base) differing '''\
+            '''from this one only in the plates from order on if given'''
+        if (wants := self.get(positions)) is not None:
+            self.move_to_end(positions)
+            return wants
+        if base is None:
+            new = bytearray(len(positions))
+            if new:
+                new[0] = 2
+            order = 0
+        else:
+            new = bytearray(base)
+        _fill_wants(positions, new, order)
+        self[positions] = wants = bytes(new)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+        return wants
+
+
+EVAL_CACHE = PlanCache()
+
+
+def _plan_moves(positions: bytes, wants: bytes) -> MoveGen:
+    '''the moves to carry out the plan'''
+    tower_tall = len(positions)
+    # the plates not where wanted, as bytes of a big int
+    diff = int.from_bytes(positions, 'big') ^ int.from_bytes(wants, 'big')
+    if not diff:
+        raise HenoiStepOver('finish')
+    if positions.count(positions[0]) == tower_tall:
+        return _moves(tower_tall, start_pos=positions[0], end_pos=2)  # type: ignore
+    first = tower_tall-1-((diff.bit_length()-1) >> 3)
+    last = tower_tall-1-(((diff & -diff).bit_length()-1) >> 3)
+    return _stepfy([Movement(positions[order], wants[order])  # type: ignore
+                    for order in range(last, first-1, -1)], tower_tall, first)
+
+
 # PART main func
 
 
+@lru_cache(maxsize=None)
+def _move_states(odd: int, start_pos: Position, end_pos: Position) -> tuple[Movement, ...]:
+    '''Movements indexed by step % 3 * 2 + reversed'''
+    temp_pos: Position = (start_pos | end_pos) ^ 3  # type: ignore
+    if odd:
+        temp_pos, end_pos = end_pos, temp_pos
+    return (
+        Movement(start_pos, temp_pos), Movement(temp_pos, start_pos),
+        Movement(end_pos, start_pos), Movement(start_pos, end_pos),
+        Movement(temp_pos, end_pos), Movement(end_pos, temp_pos)
+    )
+
+
 def _move(step: int, level: int, *, start_pos: Position = 0, end_pos: Position = 2) -> Movement:
     '''the function solve a henoi move on the step. '''\
         '''odd level are diffrent direction to eve'''
-    # pylint: disable=invalid-name
-    temp_pos = (start_pos | end_pos) ^ 3
-    step_state = step % 3
-    if level & 1:
-        temp_pos, end_pos = end_pos, temp_pos  # type: ignore
-    if not step_state:
-        from_, to = start_pos, temp_pos
-    elif step_state & 1:
-        from_, to = end_pos, start_pos
-    else:
-        from_, to = temp_pos, end_pos
-    if not (step+1 ^ step).bit_length() & 1:  # right most 0 position is odd
-        from_, to = to, from_
-    return Movement(from_, to)  # type: ignore
+    # right most 0 position is even -> reversed
+    return _move_states(level & 1, start_pos, end_pos)[
+        step % 3 * 2 + (not (step+1 ^ step).bit_length() & 1)]
 
 
 def _moves(level: int, *, start_pos: Position = 0, end_pos: Position = 2) -> MoveGen:
     '''the function solve a henoi move on the step. '''\
         '''odd level are diffrent direction to eve'''
-    # pylint: disable=invalid-name
-    temp_pos: Position = (start_pos | end_pos) ^ 3  # type: ignore
-    if level & 1:
-        temp_pos, end_pos = end_pos, temp_pos
-    states = (
-        Movement(start_pos, temp_pos),
-        Movement(end_pos, start_pos),
-        Movement(temp_pos, end_pos)
-    )
-    states_rev = (
-        Movement(temp_pos, start_pos),
-        Movement(start_pos, end_pos),
-        Movement(end_pos, temp_pos)
-    )
-    for step in range((1 << level)-1):
-        if bit_length(step+1 ^ step) & 1:  # right most 0 position is odd
-            yield states[step % 3]
-        else:
-            yield states_rev[step % 3]
+    # pylint: disable=import-outside-toplevel
+    from .packed import move_blocks
+    decode = CODE_MOVES.__getitem__
+    for block in move_blocks(level, start_pos=start_pos, end_pos=end_pos):
+        yield from map(decode, block)
+
+
+@dataclass(slots=True)
+class MoveCursor:
+    '''A resumable iterator of the moves from the step till the stop, '''\
+        '''which pickles to a few integers'''
+    level: int
+    start_pos: Position = 0
+    end_pos: Position = 2
+    step: int = 0
+    stop: int = -1
+    _states: tuple[Movement, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.start_pos == self.end_pos:
+            raise HenoiPositionError('start_pos should not be end_pos')
+        total = (1 << self.level)-1
+        if self.stop < 0:
+            self.stop = total
+        if not 0 <= self.step <= self.stop <= total:
+            raise HenoiStepOver('over than all step')
+        self._states = _move_states(self.level & 1, self.start_pos, self.end_pos)
+
+    def __iter__(self) -> Self:
+        return self
+
+    def __next__(self) -> Movement:
+        step = self.step
+        if step >= self.stop:
+            raise StopIteration
+        self.step = step+1
+        # right most 0 position is even -> reversed
+        return self._states[step % 3 * 2 + (not (step+1 ^ step).bit_length() & 1)]
+
+    def __len__(self) -> int:
+        '''moves left'''
+        return self.stop-self.step
+
+    def __reduce__(self) -> tuple[type, tuple[int, Position, Position, int, int]]:
+        return MoveCursor, (self.level, self.start_pos, self.end_pos, self.step, self.stop)
+
+    def seek(self, step: int) -> Self:
+        '''continue from the step'''
+        if not 0 <= step <= self.stop:
+            raise HenoiStepOver('over than all step')
+        self.step = step
+        return self
+
+    def split(self, parts: int) -> list['MoveCursor']:
+        '''split the moves left into consecutive cursors'''
+        step, length = self.step, len(self)
+        bounds = [step+length*i//parts for i in range(parts+1)]
+        return [MoveCursor(self.level, self.start_pos, self.end_pos, begin, end)
+                for begin, end in zip(bounds, bounds[1:])]
 
 
 # def _bin_moves(level: int) -> MoveGen:
@@ -430,59 +682,88 @@ def _moves(level: int, *, start_pos: Position = 0, end_pos: Position = 2) -> Mov
 #         yield Movement((step & nstep) % 3, ((step | nstep)+1) % 3)
 
 
+def position_of(plate: int, step: int, level: int, *,
+                start_pos: Position = 0, end_pos: Position = 2) -> Position:
+    '''the position of the plate on the step where there are level plates'''
+    if not 0 < plate <= level:
+        raise HenoiOrderFail(f'plate should be in 1 ~ {level}')
+    if not 0 <= step < 1 << level:
+        raise HenoiStepOver('over than all step')
+    temp_pos: Position = (start_pos | end_pos) ^ 3  # type: ignore
+    # a plate moves every 2**plate steps and goes round the positions,
+    # the same way as the smallest plate of a tower with level-plate+1 plates
+    times = (step + (1 << (plate-1))) >> plate
+    if (level-plate) & 1:
+        return (start_pos, temp_pos, end_pos)[times % 3]
+    return (start_pos, end_pos, temp_pos)[times % 3]
+
+
+@lru_cache(maxsize=None)
+def _positions_table() -> tuple[tuple[bytes, int], ...]:
+    '''For (parity, rest, byte), the codes of 8 plates and the next rest. '''\
+        '''A code is (rest+bit) % 3, plus 3 on odd plates'''
+    table = []
+    for parity in (0, 1):
+        for start_rest in (0, 1, 2):
+            for byte in range(256):
+                codes, rest = bytearray(8), start_rest
+                for order in range(8):
+                    bit = (byte >> (7-order)) & 1
+                    codes[order] = (rest+bit) % 3 + 3*((parity+order) & 1)
+                    rest = (rest*2+bit) % 3
+                table.append((bytes(codes), rest))
+    return tuple(table)
+
+
+def positions_at(step: int, level: int, *,
+                 start_pos: Position = 0, end_pos: Position = 2) -> bytes:
+    '''positions of all plates on the step, from the largest one like Tower.plates_pos'''
+    if not 0 <= step < 1 << level:
+        raise HenoiStepOver('over than all step')
+    temp_pos: Position = (start_pos | end_pos) ^ 3  # type: ignore
+    # the plate moves (step >> plate) + (bit plate-1) times, only needed modulo 3,
+    # so walk the bytes from the top keeping (step >> plate) % 3
+    size = (level+7) >> 3
+    skip = (size << 3)-level
+    table = _positions_table()
+    offset = (skip & 1)*768
+    chunks = []
+    add_chunk = chunks.append
+    rest = 0
+    for byte in step.to_bytes(size, 'big'):
+        codes, rest = table[offset+rest*256+byte]
+        add_chunk(codes)
+    return b''.join(chunks)[skip:].translate(bytes((
+        start_pos, end_pos, temp_pos, start_pos, temp_pos, end_pos)).ljust(256, b'\0'))
+
+
 def _new_tower(step: int, level: int, *, start_pos: Position = 0, end_pos: Position = 2,
-               tower_name: str = '', stack_names: tuple[str, str, str] = ('', '', '')) -> Tower:
+               tower_name: str = '', stack_names: tuple[str, str, str] = ('', '', ''),
+               array_stack: bool = False) -> Tower:
     '''caculate the state of step where there are level plates.'''
     assert start_pos != end_pos
-    from_: list[Plate] = []
-    temp: list[Plate] = []
-    end: list[Plate] = []
-    a_add, b_add, c_add = from_.append, temp.append, end.append
-    plates = [Plate(x) for x in range(level, 0, -1)]
-
-    if step == 0:
-        return Tower(StackStart(plates, stack_names[0], plates[0]),
-                     StackTemp([], stack_names[1], plates[0]),
-                     StackEnd([], stack_names[2], plates[0]),
-                     tower_name)
-
-    if level == 1:
-        return Tower(StackStart([], stack_names[0], 1),
-                     StackTemp([], stack_names[1], 1),
-                     StackEnd(plates, stack_names[2], 1),
-                     tower_name)
-
-    step_str = f'{step:b}'.zfill(level+1)
-    push_str: Positions = \
-        bytearray((start_pos, end_pos)) if step_str[1] == '1' else \
-        bytearray((end_pos, start_pos))  # type: ignore
-    push = push_str.append
-    sep = 1
-
-    for order, char in list(enumerate(step_str))[2:]:
-        last = step_str[order-1]
-        if char == last:
-            push(push_str[-1])
-            sep += 1
-        else:
-            if sep % 2:
-                push(other(push_str[-1], push_str[-sep-1]))
-            else:
-                push(push_str[-sep-1])
-            sep = 1
-
-    for char, plate in zip(push_str[1:], plates):
-        if char == 0:
-            a_add(plate)
-        elif char == 1:
-            b_add(plate)
-        elif char == 2:
-            c_add(plate)
-
-    return Tower(StackStart(from_, stack_names[0], plates[0]),
-                 StackTemp(temp, stack_names[1], plates[0]),
-                 StackEnd(end, stack_names[2], plates[0]),
-                 tower_name)
+    positions = positions_at(step, level, start_pos=start_pos, end_pos=end_pos)
+    plates = _plates(level)
+
+    def plates_on(pos: int) -> Iterator[int]:
+        return compress(plates, positions.translate(ON_POSITION[pos]))
+    stacks: tuple[Stack | ArrayStack, ...]
+    if array_stack:
+        stacks = tuple(stack_type.trusted(plates_on(p), stack_names[p], level)
+                       for p, stack_type in enumerate(ARRAY_STACK_TYPES))
+    else:
+        stacks = tuple(stack_type.trusted(map(Plate, plates_on(p)), stack_names[p], level)
+                       for p, stack_type in enumerate(STACK_TYPES))
+    return Tower.trusted(stacks, bytearray(positions), tower_name)  # type: ignore
+
+
+@lru_cache(maxsize=8)
+def _plates(level: int) -> tuple[int, ...]:
+    '''plates from the largest one'''
+    return tuple(range(level, 0, -1))
+
+
+ON_POSITION = tuple(bytes((p == 0, p == 1, p == 2)).ljust(256, b'\0') for p in (0, 1, 2))
 
 
 # PART test
@@ -1,13 +1,24 @@
 '''This module halps you format a Tower'''
-from collections import deque
+from collections import OrderedDict, deque
 from dataclasses import dataclass
-from itertools import chain
-from typing import Iterable, Iterator, Literal
+from functools import lru_cache
+from itertools import chain, islice
+from queue import Empty, Full, Queue
+from shutil import get_terminal_size
+import sys
+from threading import Event, Thread
+from typing import Iterable, Iterator, Literal, Sequence
+from weakref import finalize
 # from typing_extensions import deprecated
 from colorama import Back, init
-from . import HenoiStepOver, MoveGen, Plate, Stack, Tower, Movement
+from . import HenoiStepOver, MoveCursor, MoveGen, Plate, Stack, Tower, Movement
 
-init(autoreset=True)
+if sys.platform == 'win32':
+    # only the windows console needs the translating (and resetting) wrapper,
+    # the colors are reset explicitly where it matters
+    init(autoreset=True)
+
+RESET = '\x1b[0m'
 
 
 class TowerInfo(tuple[int, int, bool]):
@@ -31,13 +42,17 @@ class TowerInfo(tuple[int, int, bool]):
     @staticmethod
     def eval_tower_info(tower: Tower, mode: Literal['auto', 'full', 'half'] = 'auto'):
         '''Get the information of a tower'''
-        height = len(tower.plates_pos)
-        half = half_tower(mode, height)
-        name_width = max(len(tower.start.name), len(
-            tower.temp.name), len(tower.end.name))+2
-        unit_width = max(name_width, height) if half else max(
-            name_width, height*2-1)
-        return TowerInfo(height, unit_width+2, half)
+        return _tower_info(len(tower.plates_pos), mode, max(
+            len(tower.start.name), len(tower.temp.name), len(tower.end.name)))
+
+
+@lru_cache(maxsize=256)
+def _tower_info(height: int, mode: Literal['auto', 'full', 'half'], name_len: int) -> TowerInfo:
+    half = half_tower(mode, height)
+    name_width = name_len+2
+    unit_width = max(name_width, height) if half else max(
+        name_width, height*2-1)
+    return TowerInfo(height, unit_width+2, half)
 
 
 class Lines(list[str]):
@@ -56,15 +71,121 @@ class Lines(list[str]):
         self._width = length
 
 
-@dataclass(slots=True)
+class Lookahead:
+    '''Pull Movements from a generator on a thread, a block at a time and at most '''\
+        '''blocks ahead of the reader. The generator should not be used elsewhere'''
+    __slots__ = ('_queue', '_stop', '_thread', '_block', '_index', '_done')
+    _queue: Queue[tuple[Movement, ...] | BaseException]
+    _stop: Event
+    _thread: Thread
+    _block: tuple[Movement, ...]
+    _index: int
+    _done: bool
+
+    def __init__(self, moves: Iterator[Movement], block: int = 4096, blocks: int = 8) -> None:
+        self._queue = Queue(maxsize=blocks)
+        self._stop = Event()
+        self._block, self._index, self._done = (), 0, False
+        self._thread = Thread(target=self._produce, args=(moves, block), daemon=True)
+        self._thread.start()
+
+    def _produce(self, moves: Iterator[Movement], size: int) -> None:
+        stop, put = self._stop, self._queue.put
+        while not stop.is_set():
+            try:
+                item: tuple[Movement, ...] | BaseException = tuple(islice(moves, size))
+            except BaseException as exc:  # pylint: disable=broad-exception-caught
+                item = exc
+            while True:
+                try:
+                    put(item, timeout=.1)
+                    break
+                except Full:
+                    if stop.is_set():
+                        return
+            # an empty block marks the end
+            if not item or isinstance(item, BaseException):
+                return
+
+    def __iter__(self) -> Iterator[Movement]:
+        return self
+
+    def __next__(self) -> Movement:
+        if self._index < len(self._block):
+            self._index += 1
+            return self._block[self._index-1]
+        if self._done:
+            raise StopIteration
+        item = self._queue.get()
+        if isinstance(item, BaseException):
+            self._done = True
+            raise item
+        if not item:
+            self._done = True
+            raise StopIteration
+        self._block, self._index = item, 1
+        return item[0]
+
+    def stop(self) -> None:
+        '''stop the producer without waiting for it, the rest is dropped'''
+        self._stop.set()
+        self._done = True
+        try:
+            while True:
+                self._queue.get_nowait()
+        except Empty:
+            pass
+
+    def close(self) -> None:
+        '''stop the producer and wait for it, the rest is dropped'''
+        self.stop()
+        # the producer sees the stop within a block and a put timeout
+        self._thread.join()
+
+
+@dataclass(slots=True, weakref_slot=True)
 class FutureMoves:
     '''A tuple of known Movements and a generator of unknown Movements'''
     known: deque[Movement]
-    unknown: MoveGen | None
+    unknown: MoveGen | MoveCursor | Lookahead | None
+    lookahead: tuple[int, int] | None = None
+    _stopper: finalize | None = None
 
-    def __init__(self, known: deque[Movement], unknown: MoveGen | None) -> None:
+    def __init__(self, known: deque[Movement],
+                 unknown: MoveGen | MoveCursor | Lookahead | None) -> None:
         self.known = known
         self.unknown = unknown
+        self.lookahead = None
+        self._stopper = None
+
+    def _look_ahead(self, unknown: MoveGen | MoveCursor) -> Lookahead:
+        '''Start a Lookahead on the unknown Movements, stopped when self is collected'''
+        assert self.lookahead is not None
+        lookahead = Lookahead(unknown, *self.lookahead)
+        self._stopper = finalize(self, lookahead.stop)
+        return lookahead
+
+    def prefetch(self, block: int = 4096, blocks: int = 8) -> None:
+        '''Generate the unknown Movements on a thread from now on, '''\
+            '''block Movements at a time and at most blocks ahead'''
+        self.lookahead = block, blocks
+        if self.unknown is not None and not isinstance(self.unknown, Lookahead):
+            self.unknown = self._look_ahead(self.unknown)
+
+    def replace(self, unknown: MoveGen | MoveCursor | None) -> None:
+        '''Replace the unknown Movements, dropping what was generated ahead'''
+        if isinstance(self.unknown, Lookahead):
+            assert self._stopper is not None
+            self._stopper.detach()
+            self.unknown.close()
+        self.unknown = unknown
+        if unknown is not None and self.lookahead is not None:
+            self.unknown = self._look_ahead(unknown)
+
+    def close(self) -> None:
+        '''Stop generating ahead, the Movements not known are dropped'''
+        if isinstance(self.unknown, Lookahead):
+            self.replace(None)
 
     def insert(self, move: Movement) -> None:
         '''Insert a Movement'''
@@ -159,14 +280,14 @@ def show(tower: Tower, width: Literal['half', 'full', 'auto'] = 'auto', *,
                             border_color=border_color,
                             content_width=lines.width())
 
-    return '\n'.join(lines)
+    return '\n'.join(lines)+RESET
 
 
 # Unit tower
 
 
 def draw_tower_from_given_repr(
-        tower: Tower, reprs: list[str], unit_width: int, spliter: str) -> Lines:
+        tower: Tower, reprs: Sequence[str], unit_width: int, spliter: str) -> Lines:
     '''Draw a tower from a given representation'''
     length = len(tower.plates_pos)
     drawn_tower = (draw_stack_from_given_repr(stack, reprs, length, unit_width)
@@ -206,6 +327,162 @@ def draw_tower(
     return lines
 
 
+# Unit repr cache
+
+ReprKey = tuple[int, int, bool, bool, str, str]
+'''(level, unit width, half, show plate level, plate color, piller color)'''
+
+
+@dataclass(slots=True)
+class TowerReprs:
+    '''The reprs of the plates of a tower with the piller at 0, and the slices of them '''\
+        '''fast_play writes: plate p at position k is sliced[p] written at the column '''\
+        '''k*unit_width+base-p of the tower, covered by sliced_pillers[p]'''
+    plates: tuple[str, ...]
+    sliced: tuple[str, ...]
+    sliced_pillers: tuple[str, ...]
+    base: int
+
+
+class ReprCache(OrderedDict[ReprKey, TowerReprs]):
+    '''Reprs of towers shared by the shows, the least recently used are dropped. '''\
+        '''A tower takes O(level*unit width) characters, so only a few are kept'''
+    maxsize: int
+
+    def __init__(self, maxsize: int = 8) -> None:
+        super().__init__()
+        self.maxsize = maxsize
+
+    def reprs(self, info: TowerInfo, *, show_plate_level: bool = False,
+              plate_color: str = '', piller_color: str = '') -> TowerReprs:
+        '''the reprs of a tower of the info'''
+        height, unit_width, half = info
+        key = (height, unit_width, half, show_plate_level, plate_color, piller_color)
+        if (reprs := self.get(key)) is not None:
+            self.move_to_end(key)
+            return reprs
+        piller = draw_piller(unit_width, half, piller_color=piller_color)
+        plates = (piller, *(
+            draw_plate(plate, unit_width, half,
+                       show_plate_level=show_plate_level, plate_color=plate_color)
+            for plate in range(1, height+1)))
+        if half:
+            base = unit_width
+            sliced = tuple(x[-i:] for i, x in enumerate(plates))
+            sliced_pillers = tuple(piller[-i:] for i in range(height+1))
+        else:
+            std_unit = unit_width//2
+            base = std_unit+1
+            sliced = tuple(x[std_unit-i+1:std_unit+i] for i, x in enumerate(plates))
+            sliced_pillers = tuple(piller[std_unit-i+1:std_unit+i] for i in range(height+1))
+        self[key] = reprs = TowerReprs(plates, sliced, sliced_pillers, base)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+        return reprs
+
+
+REPR_CACHE = ReprCache()
+
+
+# Unit viewport
+
+
+@dataclass(slots=True)
+class Viewport:
+    '''A window of rows and columns over a tower. A row stands for bin plates (the largest '''\
+        '''of them drawn), plates are scaled to the columns, and the window starts at top'''
+    rows: int
+    columns: int
+    bin: int | None = None
+    '''plates a row, None to fit the whole tower in the rows'''
+    top: int = 0
+
+    @staticmethod
+    def for_terminal(reserved_rows: int = 0, reserved_columns: int = 0) -> 'Viewport':
+        '''A viewport of the size of the terminal, leaving the reserved rows and columns'''
+        columns, rows = get_terminal_size()
+        return Viewport(max(rows-reserved_rows, 1), max(columns-reserved_columns, 9))
+
+    def plates_a_row(self, level: int) -> int:
+        '''plates binned into a row'''
+        return self.bin or max(-(-level//self.rows), 1)
+
+    def total_rows(self, level: int) -> int:
+        '''rows of the whole tower'''
+        return -(-level//self.plates_a_row(level))
+
+    def scroll(self, level: int, delta: int) -> None:
+        '''move the window down by delta rows (up if negative), within the tower'''
+        self.top = max(0, min(self.top+delta, self.total_rows(level)-self.rows))
+
+    def status(self, level: int) -> str:
+        '''which rows are shown'''
+        total = self.total_rows(level)
+        return f'rows {self.top+1}-{min(self.top+self.rows, total)} of {total}, '\
+            f'{self.plates_a_row(level)} plates a row'
+
+
+def draw_scaled_plate(
+    plate: int, level: int, width: int, half: bool, *,
+    show_plate_level: bool = False, plate_color: str = ''
+) -> str:
+    '''Draw a plate of a tower of level plates scaled to the width'''
+    # half: the largest plate is width-1 long, right aligned after a space;
+    # full: plates are odd long and centered, so the largest has a space on each side
+    # for an odd width (width-2 long), or only on the right for an even one (width-1)
+    if half:
+        size = max(1, plate*(width-1)//level)
+        res = f'{"-"*(size-1)}+'
+    else:
+        arm = (plate-1)*(width//2-1)//max(level-1, 1)
+        res = f'{"-"*arm}+{"-"*arm}'
+    if show_plate_level and len(label := str(plate)) <= len(res):
+        res = label.center(len(res), '-') if not half else label.rjust(len(res), '-')
+    res = f'{res: >{width}}' if half else res.center(width)
+    if plate_color:
+        return f'{plate_color}{res}{ANSI_RESET}'
+    return res
+
+
+def draw_viewport(
+    tower: Tower, viewport: Viewport, width: Literal['half', 'full', 'auto'] = 'auto', *,
+    show_plate_level: bool = False,
+    spliter: str = '=', spliter_color: str = '',
+    piller_color: str = '', plate_color: str = ''
+) -> Lines:
+    '''Draw the rows of a tower in the viewport, the cost is bounded by the viewport'''
+    level = len(tower.plates_pos)
+    half = half_tower(width, level)
+    unit_width = max(viewport.columns//3, 3)
+    per_row = viewport.plates_a_row(level)
+    piller = draw_piller(unit_width, half, piller_color=piller_color)
+    drawn: dict[int, str] = {}
+
+    def plate_at(stack: Stack | Iterable[int], row: int) -> str:
+        # the lowest height the row stands for holds the largest plate of the row
+        lowest = max(level-(row+1)*per_row, 0)
+        if lowest >= len(stack):  # type: ignore
+            return piller
+        plate = stack[lowest]  # type: ignore
+        if (res := drawn.get(plate)) is None:
+            res = drawn[plate] = draw_scaled_plate(
+                plate, level, unit_width, half,
+                show_plate_level=show_plate_level, plate_color=plate_color)
+        return res
+
+    stacks = (tower.start, tower.temp, tower.end)
+    last = min(viewport.top+viewport.rows, viewport.total_rows(level))
+    lines = add_names(
+        Lines(''.join(plate_at(stack, row) for stack in stacks)
+              for row in range(viewport.top, last)),
+        (tower.start.name, tower.temp.name, tower.end.name),
+        unit_width,
+        spliter=spliter_color+spliter*(3*unit_width)
+    )
+    lines.set_width(unit_width*3)
+    return lines
+
+
 # Unit evaluation
 
 def evaluate(tower: Tower, steps: int) -> FutureMoves:
@@ -232,13 +509,16 @@ def eval_to_lines(
     '''Convert a list of Movement to a Lines and a generator of next evaluations'''
     if not evaluations:
         return Lines([' '*(len(left_wrap+right_wrap)+6)]*(fix_steps or 0))
+    # the last one shown, marked with finish or unfinish
+    last = min(len(evaluations), fix_steps)-1 if fix_steps else len(evaluations)-1
     resault = Lines(
-        str(m).join((left_wrap, right_wrap)) for m, _ in zip(evaluations, range((fix_steps or 1)-1))
+        str(m).join((left_wrap, right_wrap))
+        for m in islice(evaluations, last if fix_steps else 0)
     )
     resault.append(
-        f'{left_wrap}{evaluations[-1]}{finish if done else unfinish}')
+        f'{left_wrap}{evaluations[last]}{finish if done else unfinish}')
     if fix_steps is not None:
-        resault.extend([' '*len(resault[0])]*(fix_steps-len(evaluations)))
+        resault.extend([' '*len(resault[0])]*(fix_steps-len(resault)))
     return resault
 
 
@@ -315,7 +595,7 @@ def draw_stack(
 
 
 def draw_stack_from_given_repr(
-        stack: Stack, reprs: list[str], length: int | None, width: int) -> Lines:
+        stack: Stack, reprs: Sequence[str], length: int | None, width: int) -> Lines:
     '''Draw a stack from a given representation'''
     if length is None:
         length = len(stack)
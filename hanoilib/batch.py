@@ -0,0 +1,50 @@
+'''Bulk evaluation of henoi moves with NumPy'''
+from typing import Iterable
+import numpy as np
+from numpy.typing import NDArray
+from . import HenoiStepOver, Position
+
+
+StepArray = NDArray[np.uint64]
+
+MoveArrays = tuple[NDArray[np.uint8], NDArray[np.uint8]]
+
+EVEN_BITS = np.uint64(0x5555_5555_5555_5555)
+
+
+def _as_steps(steps: StepArray | range | Iterable[int]) -> StepArray:
+    '''Convert steps into an array of uint64'''
+    if isinstance(steps, range):
+        return np.arange(steps.start, steps.stop, steps.step, dtype=np.uint64)
+    return np.asarray(steps, dtype=np.uint64)
+
+
+def _state_table(level: int, start_pos: Position, end_pos: Position) -> MoveArrays:
+    '''Return the (from, to) lookup indexed by step % 3 * 2 + reversed'''
+    temp_pos = (start_pos | end_pos) ^ 3
+    if level & 1:
+        temp_pos, end_pos = end_pos, temp_pos  # type: ignore
+    states = (
+        (start_pos, temp_pos), (temp_pos, start_pos),
+        (end_pos, start_pos), (start_pos, end_pos),
+        (temp_pos, end_pos), (end_pos, temp_pos),
+    )
+    return (np.array([fr for fr, _ in states], dtype=np.uint8),
+            np.array([to for _, to in states], dtype=np.uint8))
+
+
+def moves_at(steps: StepArray | range | Iterable[int], level: int, *,
+             start_pos: Position = 0, end_pos: Position = 2) -> MoveArrays:
+    '''Solve the henoi moves on many steps at once, return (from, to) arrays.'''\
+        ''' The same as calling Movement.eval on every step.'''
+    steps = _as_steps(steps)
+    if steps.size and (level < 64 and int(steps.max()) >= (1 << level)-1):
+        raise HenoiStepOver('over than all step')
+    table_fr, table_to = _state_table(level, start_pos, end_pos)
+    # bit_length(step+1 ^ step) is odd iff step+1 has an even count of trailing zeros
+    nstep = steps+np.uint64(1)
+    low_bit = nstep & (~nstep+np.uint64(1))
+    reverse = (low_bit & EVEN_BITS) == 0
+    index = (steps % np.uint64(3)).astype(np.uint8) << 1
+    index |= reverse
+    return table_fr[index], table_to[index]
@@ -1,11 +1,15 @@
 '''The module contains the class Show to show the tower'''
 from dataclasses import dataclass, field
-from itertools import chain
-from typing import Any, Callable, Literal
+from itertools import chain, islice
+from time import perf_counter
+from typing import Any, Callable, Iterator, Literal
 from colorama import Back, Cursor
 from . import HenoiStepOver, Plate, Position, Tower, Movement
 from ._show import Lines, FutureMoves, TowerInfo,\
-    draw_tower_from_given_repr, _add_border, evaluate, eval_to_lines, draw_plate, draw_piller
+    draw_tower_from_given_repr, _add_border, evaluate, eval_to_lines,\
+    RESET, REPR_CACHE, TowerReprs, Viewport, draw_viewport
+from .screen import Screen
+from .stats import PlayStats, ProfiledFutureMoves, profiling_enabled
 
 CSI = '\033['
 
@@ -21,6 +25,15 @@ class ShowConfiguration:
     width: Literal['auto', 'half', 'full'] = 'auto'
     show_plate_level: bool = False
     spliter: str = ' '
+    profile: bool = False
+    raw: bool = False
+    lookahead: int = 0
+    scroll_eval: bool = False
+    '''scroll the evaluation in a scroll region when the move is the next step, '''\
+        '''the terminal should support left and right margins (DECLRMM)'''
+    viewport: Viewport | None = None
+    '''draw only the rows of the tower in the viewport, scaled to it, without the evaluation. '''\
+        '''Editions are then written as the changes of the viewport'''
 
 
 @dataclass(slots=True)
@@ -50,6 +63,35 @@ class EvalEdit(Edit):
     new: tuple[Movement, bool | None] | None = None
 
 
+@dataclass(slots=True)
+class EvalScroll(EvalEdit):
+    '''The class save a scroll of the evaluation up by a row'''
+
+
+class EscapeTable(dict[tuple[int, int, int], Any]):
+    '''Escapes to write a plate (or the piller covering it) at (plate, position, height), '''\
+        '''str or bytes, each made once when first used'''
+    __slots__ = ('reprs', 'base', 'bottom', 'unit_width', 'binary')
+    reprs: tuple[str, ...]
+    base: int
+    bottom: int
+    unit_width: int
+    binary: bool
+
+    def __init__(self, reprs: tuple[str, ...], base: int, bottom: int, unit_width: int,
+                 binary: bool = False) -> None:
+        super().__init__()
+        self.reprs, self.base, self.bottom = reprs, base, bottom
+        self.unit_width, self.binary = unit_width, binary
+
+    def __missing__(self, key: tuple[int, int, int]) -> Any:
+        plate, pos, height = key
+        column = pos*self.unit_width+self.base-plate
+        text = f'\033[{self.bottom-height};{column}f{self.reprs[plate]}'
+        self[key] = value = text.encode() if self.binary else text
+        return value
+
+
 class Show:
     '''The class contains configurations and methods to save shown tower string and\
         can evaluate how to use ANSI Cursor to modify the output to fix the next change'''
@@ -58,8 +100,13 @@ class Show:
     __tower: Tower
     tower_editions: list[TowerEdit]
     eval_editions: list[EvalEdit]
-    plate_repr: list[str]
+    plate_repr: tuple[str, ...]
+    reprs: TowerReprs | None
     tower_info: TowerInfo
+    stats: PlayStats | None
+    _escapes: dict[tuple[bool, bool], tuple[EscapeTable, EscapeTable]]
+    screen: Screen
+    _synced: bool
 
     def __init__(self, tower: Tower, configuration: ShowConfiguration) -> None:
         self.__tower = tower
@@ -68,16 +115,50 @@ class Show:
         self.tower_editions = []
         self.eval_editions = []
         self.tower_info = TowerInfo.eval_tower_info(tower, configuration.width)
+        self.stats = None
+        self.reprs = None
+        self._escapes = {}
+        # whether the screen holds what the terminal shows, editions are not followed
+        self.screen = Screen()
+        self._synced = True
+        if profiling_enabled(configuration.profile):
+            self._instrument(PlayStats())
+        if configuration.lookahead:
+            self.evaluations.prefetch(configuration.lookahead)
+
+    def _reset_evaluations(self) -> None:
+        '''Evaluate the tower again, like a new Show'''
+        self.evaluations.replace(None)
+        self.evaluations = evaluate(self.__tower, len(self.__tower.plates_pos))
+        if self.stats is not None:
+            self.evaluations = ProfiledFutureMoves(self.evaluations, self.stats)
+        if self.config.lookahead:
+            self.evaluations.prefetch(self.config.lookahead)
+
+    def close(self) -> None:
+        '''Stop the lookahead thread, call it when the show is dropped or finished'''
+        self.evaluations.close()
+
+    def _instrument(self, stats: PlayStats) -> None:
+        '''Time the phases of playing into stats, the methods check self.stats themselves'''
+        self.stats = stats
+        self.evaluations = ProfiledFutureMoves(self.evaluations, stats)
 
     def get_stack_len(self, pos: Position) -> int:
         '''Get the length of the stack at the position'''
         return len(self.__tower[pos])
 
+    def steps_left(self) -> int:
+        '''Get the steps to the end'''
+        return self.__tower.steps_left()
+
     @property
     def display_lines(self) -> Lines:
         '''Get the lines to display'''
 
-        if self.config.eval:
+        if self.config.viewport is not None:
+            lines = self.viewport_lines
+        elif self.config.eval:
             lines = Lines(f'{self.config.border_color}  {Back.RESET}'.join(line)
                           for line in zip(self.tower_lines, self.evaluation_lines))
             lines.set_width(self.tower_info.unit_width*3 + 2 + 14)
@@ -108,21 +189,79 @@ class Show:
             info.unit_width,
             cfg.border_color+cfg.spliter*(3*info.unit_width),)
 
+    @property
+    def viewport_lines(self) -> Lines:
+        '''Get the lines to display the tower in the viewport'''
+        cfg = self.config
+        assert cfg.viewport is not None
+        self.tower_editions.clear()
+        self.eval_editions.clear()
+        return draw_viewport(
+            self.__tower, cfg.viewport, cfg.width,
+            show_plate_level=cfg.show_plate_level,
+            spliter=cfg.spliter, spliter_color=cfg.border_color,
+            piller_color=cfg.piller_color, plate_color=cfg.plate_color)
+
+    def scroll(self, delta: int) -> str:
+        '''Scroll the viewport down by delta rows (up if negative), '''\
+            '''return the escapes to redraw what changed'''
+        assert self.config.viewport is not None
+        self._sync_screen()
+        self.config.viewport.scroll(len(self.__tower.plates_pos), delta)
+        return self.redraw()
+
     @property
     def evaluation_lines(self) -> Lines:
         '''Get the lines to display the evaluation'''
-        evaluate_lines = eval_to_lines(
-            self.evaluations.known,
-            self.evaluations.unknown is None,
-            fix_steps=self.tower_info[0])
+        evaluate_lines = self._evaluation_rows()
         evaluate_lines.append(
             f'{self.config.border_color}{" "*14}{Back.RESET}')
         evaluate_lines.append('  next steps  ')
         self.eval_editions.clear()
         return evaluate_lines
 
+    def _evaluation_rows(self) -> Lines:
+        '''The rows of the next steps as the editions draw them'''
+        height = self.tower_info[0]
+        evaluations = self.evaluations
+        # one more to know whether the last shown is the end
+        shown = evaluations.calculate_till(height+1)
+        return eval_to_lines(
+            list(islice(evaluations.known, height)),
+            evaluations.unknown is None and shown <= height,
+            fix_steps=height)
+
     def __str__(self) -> str:
-        return '\n'.join(self.display_lines)
+        lines = self.display_lines
+        self.screen.shown(lines)
+        self._synced = True
+        return '\n'.join(lines)+RESET
+
+    def _sync_screen(self) -> None:
+        '''Let the screen hold the current frame if editions were written since'''
+        if not self._synced:
+            self.screen.shown(self.display_lines)
+            self._synced = True
+
+    def redraw(self) -> str:
+        '''Return the escapes to turn the frame last drawn into the current one'''
+        text = self.screen.frame(self.display_lines)
+        self._synced = True
+        return text
+
+    def configure(self, **changes: Any) -> str:
+        '''Change the configuration, return the escapes to redraw what changed'''
+        self._sync_screen()
+        for name, value in changes.items():
+            setattr(self.config, name, value)
+        return self.redraw()
+
+    def seek(self, step: int, *, start_pos: Position = 0, end_pos: Position = 2) -> str:
+        '''Jump to the step, return the escapes to redraw what changed'''
+        self._sync_screen()
+        self.__tower.seek(step, start_pos=start_pos, end_pos=end_pos)
+        self._reset_evaluations()
+        return self.redraw()
 
     def move(self, movement: Movement) -> None:
         '''Move a plate in the tower'''
@@ -146,160 +285,348 @@ class Show:
             self.eval_editions.append(EvalEdit(0, None))
             raise HenoiStepOver
 
-    def fast_play(self, io_cb: Callable[[str], Any]) -> None:
-        '''Play the tower'''
-        io_cb('\033[s')
+    def escapes(self, binary: bool = False) -> tuple[EscapeTable, EscapeTable]:
+        '''Return the tables (draw, erase) of escapes for the current repr'''
+        border = self.config.border
+        if (tables := self._escapes.get((binary, border))) is None:
+            if self.reprs is None:
+                self.generate_repr()
+            assert self.reprs is not None
+            base = (border << 1)+1+self.reprs.base
+            bottom = self.tower_info[0]+border
+            tables = self._escapes[binary, border] = (
+                EscapeTable(self.reprs.sliced, base, bottom, self.tower_info[1], binary),
+                EscapeTable(self.reprs.sliced_pillers, base, bottom, self.tower_info[1], binary))
+        return tables
+
+    def fast_play(self, io_cb: Callable[[Any], Any], *,
+                  fps: float | None = None, frame_moves: int | None = None,
+                  clock: Callable[[], float] = perf_counter, binary: bool = False) -> None:
+        '''Play the tower. With fps or frame_moves, moves are applied at full speed and '''\
+            '''only the net change of each frame is written. With binary, io_cb takes bytes. '''\
+            '''With fps, clock is read once before the first move and once after each move'''
+        if self.config.viewport is not None:
+            self._viewport_play(io_cb, fps, frame_moves, clock, binary)
+            return
+        if fps is not None or frame_moves is not None:
+            self._frame_play(io_cb, fps, frame_moves, clock, binary)
+            return
+        save, restore = '\033[s', '\x1b[0m\033[u'
+        io_cb(save.encode() if binary else save)
         con = ''.join
         tower = self.__tower
         tower_st = tower._stacks
         poper = tower_st[0].pop, tower_st[1].pop, tower_st[2].pop
         adder = tower_st[0].append, tower_st[1].append, tower_st[2].append
-        tower_h = self.tower_info[0]
-        unit_w = self.tower_info[1]
-        padx = (pady := self.config.border)*3
-        piller = self.plate_repr[0]
-        if self.tower_info[2]:
-            pxsu = padx+unit_w
-            plate_repr = tuple(x[-i:] for i, x in enumerate(self.plate_repr))
-            piller_repr = tuple(piller[-i:] for i in range(tower_h+1))
-        else:
-            std_unit = unit_w//2
-            pxsu = padx+std_unit+1
-            plate_repr = tuple(x[std_unit-i+1:std_unit+i] for i, x in enumerate(self.plate_repr))
-            piller_repr = tuple(piller[std_unit-i+1:std_unit+i] for i in range(tower_h+1))
+        lens = tower_st[0].__len__, tower_st[1].__len__, tower_st[2].__len__
+        draw, erase = self.escapes(binary)
 
         try:
             if not self.config.eval:
-                th_fix_t = (th_fix_f := tower_h+pady)+1
-                for p_fr, p_to in tower.eval():
+                moves: Iterator[Movement] = tower.eval()
+                if self.stats is not None:
+                    moves = self.stats.timed_moves(moves)
+                for p_fr, p_to in moves:
                     plate = poper[p_fr]()
+                    io_cb(erase[plate, p_fr, lens[p_fr]()] + draw[plate, p_to, lens[p_to]()])
                     adder[p_to](plate)
-                    io_cb(f'\
-\033[{th_fix_f-len(tower_st[p_fr])};{p_fr*unit_w+pxsu-plate}f{piller_repr[plate]}\
-\033[{th_fix_t-len(tower_st[p_to])};{p_to*unit_w+pxsu-plate}f{plate_repr[plate]}'
-                    )
             else:
-                for move in self.evaluations:
+                evaluations = self.evaluations
+                while evaluations:
+                    # edit_evaluation takes the move out of the evaluations
+                    move = evaluations.known[0]
                     self.edit_tower(move)
                     self.edit_evaluation(move)
                     tower._move_without_check(move)
-                    io_cb(con(chain(
+                    edition = con(chain(
                         (self._decode_tower_edition(edit)
                          for edit in self.tower_editions),
                         (self._decode_evaluation_edition(edit)
                          for edit in self.eval_editions)
-                    )))
+                    ))
+                    io_cb(edition.encode() if binary else edition)
                     self.eval_editions.clear()
                     self.tower_editions.clear()
         finally:
             self.__tower.update_plates_pos()
-            io_cb('\x1b[0m\033[u')
+            self._synced = False
+            io_cb(restore.encode() if binary else restore)
             # io_cb(None)
 
+    def _frame_play(self, io_cb: Callable[[Any], Any], fps: float | None,
+                    frame_moves: int | None, clock: Callable[[], float], binary: bool) -> None:
+        '''Play the tower, writing the net change once a frame'''
+        save, restore = '\033[s', '\x1b[0m\033[u'
+        io_cb(save.encode() if binary else save)
+        tower = self.__tower
+        tower_st = tower._stacks
+        plates_pos = tower.plates_pos
+        poper = tower_st[0].pop, tower_st[1].pop, tower_st[2].pop
+        adder = tower_st[0].append, tower_st[1].append, tower_st[2].append
+        tower_h = self.tower_info[0]
+        pady = self.config.border
+        draw, erase = self.escapes(binary)
+        frame_time = 1/fps if fps else 0.
+        frame_moves = frame_moves or 0
+        # the plate (or 0 for none) shown at (position, height) since the last frame
+        dirty: dict[tuple[int, int], int] = {}
+        eval_x = self._eval_column()
+        shown_eval = list(self.evaluation_lines)[:tower_h] if self.config.eval else []
+
+        def flush() -> None:
+            parts = []
+            for (pos, height), old in dirty.items():
+                stack = tower_st[pos]
+                new = stack[height] if height < len(stack) else 0
+                if new == old:
+                    continue
+                if new < old:
+                    parts.append(erase[old, pos, height])
+                if new:
+                    parts.append(draw[new, pos, height])
+            dirty.clear()
+            if self.config.eval:
+                lines = self._evaluation_rows()
+                for row, (old_line, line) in enumerate(zip(shown_eval, lines)):
+                    if old_line != line:
+                        line_at = f'\033[{row+pady+1};{eval_x}H{line}'
+                        parts.append(line_at.encode() if binary else line_at)
+                        shown_eval[row] = line
+            if parts:
+                io_cb((b'' if binary else '').join(parts))
+
+        if self.config.eval:
+            def eval_moves() -> Iterator[Movement]:
+                evaluations = self.evaluations
+                while evaluations:
+                    # edit_evaluation takes the move out of the evaluations
+                    move = evaluations.known[0]
+                    self.edit_evaluation(move)
+                    self.eval_editions.clear()
+                    yield move
+            moves: Iterator[Movement] = eval_moves()
+        else:
+            moves = tower.eval()
+        if self.stats is not None:
+            moves = self.stats.timed_moves(moves)
+
+        count = 0
+        next_frame = clock()+frame_time
+        try:
+            for p_fr, p_to in moves:
+                plate = poper[p_fr]()
+                dirty.setdefault((p_fr, len(tower_st[p_fr])), plate)
+                dirty.setdefault((p_to, len(tower_st[p_to])), 0)
+                adder[p_to](plate)
+                plates_pos[-plate] = p_to
+                count += 1
+                if frame_time:
+                    if (now := clock()) >= next_frame or count == frame_moves:
+                        flush()
+                        count = 0
+                        next_frame = now+frame_time
+                elif count == frame_moves:
+                    flush()
+                    count = 0
+            flush()
+        finally:
+            tower.update_plates_pos()
+            self._synced = False
+            io_cb(restore.encode() if binary else restore)
+
+    def _viewport_play(self, io_cb: Callable[[Any], Any], fps: float | None,
+                       frame_moves: int | None, clock: Callable[[], float], binary: bool) -> None:
+        '''Play the tower, writing the changes of the viewport once a frame (or a move)'''
+        self._sync_screen()
+        tower = self.__tower
+        frame_time = 1/fps if fps else 0.
+        frame_moves = frame_moves or (0 if fps else 1)
+        moves: Iterator[Movement] = tower.eval()
+        if self.stats is not None:
+            moves = self.stats.timed_moves(moves)
+
+        def flush() -> None:
+            if text := self.redraw():
+                io_cb(text.encode() if binary else text)
+
+        count = 0
+        next_frame = clock()+frame_time
+        try:
+            for move in moves:
+                tower._move_without_check(move)
+                count += 1
+                if frame_time:
+                    if (now := clock()) >= next_frame or count == frame_moves:
+                        flush()
+                        count = 0
+                        next_frame = now+frame_time
+                elif count == frame_moves:
+                    flush()
+                    count = 0
+        finally:
+            flush()
+
     def read_editions(self) -> str:
         '''Read the editions'''
-        resault = f'''\033[s{"".join(chain(
-            (self._decode_tower_edition(edit) for edit in self.tower_editions),
-            (self._decode_evaluation_edition(edit) for edit in self.eval_editions),
-        ))}\x1b[0m\033[u'''
-        self.tower_editions.clear()
-        self.eval_editions.clear()
-        return resault
+        if (stats := self.stats) is not None:
+            stats.enter('encode')
+        try:
+            if self.config.viewport is not None:
+                self.tower_editions.clear()
+                self.eval_editions.clear()
+                return self.redraw()
+            resault = f'''\033[s{"".join(chain(
+                (self._decode_tower_edition(edit) for edit in self.tower_editions),
+                (self._decode_evaluation_edition(edit) for edit in self.eval_editions),
+            ))}\x1b[0m\033[u'''
+            self.tower_editions.clear()
+            self.eval_editions.clear()
+            self._synced = False
+            return resault
+        finally:
+            if stats is not None:
+                stats.leave()
 
     def edit_tower(self, move: Movement) -> None:
         '''Add an edition'''
-        edit = self.tower_editions.append
-        fr_row, to_row = map(lambda p: self.tower_info[0]-self.get_stack_len(p),
-                             move)
-        edit(TowerEdit(fr_row, move[0], None))
-        edit(TowerEdit(to_row-1, move[1], self.__tower[move[0]][-1]))
+        if (stats := self.stats) is not None:
+            stats.moves += 1
+            stats.enter('edit')
+        try:
+            edit = self.tower_editions.append
+            fr_row, to_row = map(lambda p: self.tower_info[0]-self.get_stack_len(p),
+                                 move)
+            edit(TowerEdit(fr_row, move[0], None))
+            edit(TowerEdit(to_row-1, move[1], self.__tower[move[0]][-1]))
+        finally:
+            if stats is not None:
+                stats.leave()
 
     def edit_evaluation(self, move: Movement) -> None:
         '''Add an edition to the evaluation part'''
+        if (stats := self.stats) is not None:
+            stats.enter('edit')
         try:
-            next_eval = next(self.evaluations)
-        except StopIteration:
-            self.evaluations.insert(move.reverse())
-            if self.config.eval:
-                self.eval_editions.append(EvalEdit(0, (move.reverse(), True)))
-            return
-        edit = self.eval_editions.append
-        state: Literal[0, 1, 2]  # 0 for same, 1 for unnecessary, 2 for other
-        if move == next_eval:
-            state = 0
-        elif move[0] == next_eval[0]:
-            self.evaluations.insert(Movement(move[1], next_eval[1]))
-            state = 1
-        else:
-            self.evaluations.known.clear()
-            self.evaluations.unknown = self.__tower.move(move).eval()
-            self.__tower.move(move.reverse())
-            state = 2
-
-        if not self.config.eval:
-            return
+            try:
+                next_eval = next(self.evaluations)
+            except StopIteration:
+                self.evaluations.insert(move.reverse())
+                if self.config.eval:
+                    self.eval_editions.append(EvalEdit(0, (move.reverse(), True)))
+                return
+            edit = self.eval_editions.append
+            state: Literal[0, 1, 2]  # 0 for same, 1 for unnecessary, 2 for other
+            if move == next_eval:
+                state = 0
+            elif move[0] == next_eval[0]:
+                self.evaluations.insert(Movement(move[1], next_eval[1]))
+                state = 1
+            else:
+                self.evaluations.known.clear()
+                self.evaluations.replace(self.__tower.eval_after(move))
+                state = 2
 
-        ev_len = self.evaluations.calculate_till(self.tower_info[0]+1)
-        known = self.evaluations.known
+            if not self.config.eval:
+                return
 
-        if not ev_len:
-            edit(EvalEdit(0, None))
-            return
+            ev_len = self.evaluations.calculate_till(self.tower_info[0]+1)
+            known = self.evaluations.known
 
-        if ev_len == 1:
-            edit(EvalEdit(0, (known[0], True)))
-            edit(EvalEdit(None, None))
-            return
+            if not ev_len:
+                edit(EvalEdit(0, None))
+                return
 
-        edit(EvalEdit(0, (known[0], None)))
-        if state != 1:
-            end = ev_len <= self.tower_info[0]
-            till = min(ev_len, self.tower_info[0])-1
-            for i in range(1, till):
-                edit(EvalEdit(None, (known[i], None)))
-            # for ev_move in known[1:till]:
-            #     edit(EvalEdit(None, (ev_move, None)))
-            edit(EvalEdit(None, (known[till], end)))
-            if end and ev_len < self.tower_info[0]:
+            if ev_len == 1:
+                edit(EvalEdit(0, (known[0], True)))
                 edit(EvalEdit(None, None))
+                return
+
+            height = self.tower_info[0]
+            if state == 0 and self.config.scroll_eval and ev_len > height > 1:
+                # the rows shift up by one, only the old and the new last rows change
+                edit(EvalScroll())
+                edit(EvalEdit(height-2, (known[height-2], None)))
+                edit(EvalEdit(None, (known[height-1], False)))
+                return
+
+            edit(EvalEdit(0, (known[0], None)))
+            if state != 1:
+                end = ev_len <= self.tower_info[0]
+                till = min(ev_len, self.tower_info[0])-1
+                for i in range(1, till):
+                    edit(EvalEdit(None, (known[i], None)))
+                # for ev_move in known[1:till]:
+                #     edit(EvalEdit(None, (ev_move, None)))
+                edit(EvalEdit(None, (known[till], end)))
+                if end and ev_len < self.tower_info[0]:
+                    edit(EvalEdit(None, None))
+        finally:
+            if stats is not None:
+                stats.leave()
 
     def _decode_tower_edition(self, edit: TowerEdit) -> str:
         '''Decode a tower edition'''
-        # assert isinstance(value, Plate) or value is None
-        pad = self.config.border
-        x_pos = edit.col*self.tower_info[1]+(pad << 1)+1
-        y_pos = edit.row+pad+1
+        if (stats := self.stats) is not None:
+            stats.enter('encode')
+        try:
+            # assert isinstance(value, Plate) or value is None
+            pad = self.config.border
+            x_pos = edit.col*self.tower_info[1]+(pad << 1)+1
+            y_pos = edit.row+pad+1
+
+            value = self.plate_repr[edit.new or 0]
 
-        value = self.plate_repr[edit.new or 0]
+            return STR_AT_T % (y_pos, x_pos, value)
+        finally:
+            if stats is not None:
+                stats.leave()
 
-        return STR_AT_T % (y_pos, x_pos, value)
+    def _eval_column(self) -> int:
+        '''The first column of the evaluation, after the tower and the two spaces between'''
+        return self.tower_info.unit_width*3+(self.config.border << 1)+3
 
     def _decode_evaluation_edition(self, edit: EvalEdit) -> str:
         '''Decode an evaluation edition'''
+        if (stats := self.stats) is not None:
+            stats.enter('encode')
+        try:
+            if isinstance(edit, EvalScroll):
+                return self._scroll_evaluation()
 
-        if new := edit.new:
-            value = f'  {new[0]}{" "*6 if new[1] is None else " @    " if new[1] else " ...  "}'
-        else:
-            value = ' '*14
+            if new := edit.new:
+                value = f'  {new[0]}{" "*6 if new[1] is None else " @    " if new[1] else " ...  "}'
+            else:
+                value = ' '*14
 
-        padx = self.config.border*2
-        pady = self.config.border
-        pos_str = \
-            Cursor.POS(self.tower_info.unit_width*3+padx*2+1,
-                       edit.row+pady+1) if edit.row is not None else Cursor.DOWN(1)+Cursor.BACK(14)
-        return f'{pos_str}{value}'
+            pos_str = \
+                Cursor.POS(self._eval_column(), edit.row+self.config.border+1) \
+                if edit.row is not None else Cursor.DOWN(1)+Cursor.BACK(14)
+            return f'{pos_str}{value}'
+        finally:
+            if stats is not None:
+                stats.leave()
+
+    def _scroll_evaluation(self) -> str:
+        '''Scroll the evaluation up by a row inside margins around it. '''\
+            '''With the left and right margins on, CSI s sets them, '''\
+            '''so the cursor is saved by ESC 7'''
+        left = self._eval_column()
+        top = self.config.border+1
+        return (f'\0337\033[?69h\033[{top};{top+self.tower_info[0]-1}r'
+                f'\033[{left};{left+13}s\033[S'
+                '\033[r\033[s\033[?69l\0338')
 
     def generate_repr(self) -> None:
         '''Generate the representation of the tower'''
         cfg = self.config
-        info = TowerInfo.eval_tower_info(self.__tower, cfg.width)
-        self.plate_repr = [draw_plate(
-            plate, info.unit_width, info.half,
+        reprs = REPR_CACHE.reprs(
+            TowerInfo.eval_tower_info(self.__tower, cfg.width),
             show_plate_level=cfg.show_plate_level,
-            plate_color=cfg.plate_color)
-            for plate in range(1, self.tower_info[0]+1)]
-        self.plate_repr.insert(0, draw_piller(
-            info.unit_width, info.half, piller_color=cfg.piller_color))
+            plate_color=cfg.plate_color, piller_color=cfg.piller_color)
+        if reprs is not self.reprs:
+            self.reprs = reprs
+            self.plate_repr = reprs.plates
+            self._escapes.clear()
 
 
 STR_AT_T = '\033[%d;%dH%s'
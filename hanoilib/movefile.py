@@ -0,0 +1,302 @@
+'''A binary file format of henoi moves with random access through mmap'''
+from functools import lru_cache
+from itertools import islice
+import mmap
+import struct
+from typing import BinaryIO, Iterable, Literal, Self, overload
+import zlib
+from . import HenoiImposible, HenoiStepOver, MoveGen, Movement, Position
+from .packed import MoveBuffer, move_blocks
+
+
+class HenoiFileError(HenoiImposible):
+    '''The file is not a valid move file'''
+
+
+MAGIC = b'HANOIMV\0'
+
+VERSION = 1
+
+HEADER = struct.Struct('<8sBBBBIQI4x')
+'''magic, version, bits per move, start_pos, end_pos, level, moves, crc32 of the payload'''
+
+CHUNK = 1 << 20
+'''moves packed or decoded at once, should be a multiple of 8'''
+
+Bits = Literal[3, 8]
+
+
+# PART 3 bits packing
+# 8 moves are packed into 3 bytes little endian, move k at bits 3k ~ 3k+2.
+# The lanes are merged (or split) by shifting the whole chunk as one big int.
+
+
+@lru_cache(maxsize=8)
+def _masks(size: int) -> tuple[int, ...]:
+    '''masks for size bytes, each repeating a pattern of 8 bytes'''
+    def repeat(pattern: int) -> int:
+        return int.from_bytes(pattern.to_bytes(8, 'little')*(size >> 3), 'little')
+    return (
+        repeat(0x0007_0007_0007_0007), repeat(0x0038_0038_0038_0038),
+        repeat(0x0000_003F_0000_003F), repeat(0x0000_0FC0_0000_0FC0),
+        repeat(0x0000_0000_0000_0FFF), repeat(0x0000_0000_00FF_F000),
+    )
+
+
+def pack3(codes: bytes | bytearray | memoryview) -> bytes:
+    '''pack move codes 3 bits each, len(codes) should be a multiple of 8'''
+    size = len(codes)
+    if not size:
+        return b''
+    m8a, m8b, m16a, m16b, m32a, m32b = _masks(size)
+    value = int.from_bytes(codes, 'little')
+    value = (value & m8a) | ((value >> 5) & m8b)
+    value = (value & m16a) | ((value >> 10) & m16b)
+    value = (value & m32a) | ((value >> 20) & m32b)
+    lanes = value.to_bytes(size, 'little')
+    packed = bytearray(size//8*3)
+    packed[0::3], packed[1::3], packed[2::3] = lanes[0::8], lanes[1::8], lanes[2::8]
+    return bytes(packed)
+
+
+def unpack3(packed: bytes | bytearray | memoryview) -> bytes:
+    '''unpack 3 bits codes, len(packed) should be a multiple of 3'''
+    size = len(packed)//3*8
+    if not size:
+        return b''
+    m8a, m8b, m16a, m16b, m32a, m32b = _masks(size)
+    lanes = bytearray(size)
+    lanes[0::8], lanes[1::8], lanes[2::8] = packed[0::3], packed[1::3], packed[2::3]
+    value = int.from_bytes(lanes, 'little')
+    value = (value & m32a) | ((value & m32b) << 20)
+    value = (value & m16a) | ((value & m16b) << 10)
+    value = (value & m8a) | ((value & m8b) << 5)
+    return value.to_bytes(size, 'little')
+
+
+# PART writer
+
+
+class MoveFileWriter:
+    '''Write moves into a move file as a stream'''
+    file: BinaryIO
+    level: int
+    start_pos: Position
+    end_pos: Position
+    bits: Bits
+    count: int
+    crc: int
+    _pending: bytearray
+
+    def __init__(self, path: str, level: int, *, start_pos: Position = 0, end_pos: Position = 2,
+                 bits: Bits = 8) -> None:
+        if bits not in {3, 8}:
+            raise HenoiFileError('only 3 or 8 bits per move')
+        self.file = open(path, 'wb')  # pylint: disable=consider-using-with
+        self.level, self.start_pos, self.end_pos, self.bits = level, start_pos, end_pos, bits
+        self.count = self.crc = 0
+        self._pending = bytearray()
+        self.file.write(self._header())
+
+    def _header(self) -> bytes:
+        return HEADER.pack(MAGIC, VERSION, self.bits, self.start_pos, self.end_pos,
+                           self.level, self.count, self.crc)
+
+    def _write_payload(self, payload: bytes | bytearray | memoryview) -> None:
+        self.crc = zlib.crc32(payload, self.crc)
+        self.file.write(payload)
+
+    def write_codes(self, codes: bytes | bytearray | memoryview) -> None:
+        '''write packed move codes, like a MoveBuffer or blocks of hanoilib.packed'''
+        self.count += len(codes)
+        if self.bits == 8:
+            self._write_payload(codes)
+            return
+        # extend in place, += would let a MoveBuffer on the right build a new buffer
+        self._pending.extend(codes)
+        whole = len(self._pending) & ~7
+        with memoryview(self._pending) as pending:
+            for index in range(0, whole, CHUNK):
+                self._write_payload(pack3(pending[index:min(index+CHUNK, whole)]))
+        del self._pending[:whole]
+
+    def write(self, moves: Iterable[tuple[Position, Position]]) -> None:
+        '''write Movements, e.g. from any MoveGen'''
+        iterator = iter(moves)
+        while chunk := MoveBuffer.from_moves(islice(iterator, CHUNK)):
+            self.write_codes(chunk)
+
+    def close(self) -> None:
+        '''flush the rest and write the header'''
+        if self.file.closed:
+            return
+        if self._pending:
+            self._write_payload(pack3(self._pending.ljust((len(self._pending)+7) & ~7, b'\0')))
+            self._pending.clear()
+        self.file.seek(0)
+        self.file.write(self._header())
+        self.file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def write_moves(path: str, moves: MoveGen | Iterable[Movement], level: int, *,
+                start_pos: Position = 0, end_pos: Position = 2, bits: Bits = 8) -> int:
+    '''write moves into a move file, return the number of moves'''
+    with MoveFileWriter(path, level, start_pos=start_pos, end_pos=end_pos, bits=bits) as writer:
+        writer.write(moves)
+    return writer.count
+
+
+def write_solution(path: str, level: int, *,
+                   start_pos: Position = 0, end_pos: Position = 2, bits: Bits = 8) -> int:
+    '''write all moves of the level into a move file, return the number of moves'''
+    with MoveFileWriter(path, level, start_pos=start_pos, end_pos=end_pos, bits=bits) as writer:
+        for block in move_blocks(level, start_pos=start_pos, end_pos=end_pos):
+            writer.write_codes(block)
+    return writer.count
+
+
+# PART reader
+
+
+class MoveFile:
+    '''Read a move file with random access, the file is mapped instead of loaded'''
+    level: int
+    start_pos: Position
+    end_pos: Position
+    bits: Bits
+    crc: int
+    _count: int
+    _file: BinaryIO
+    _map: mmap.mmap
+    _payload: memoryview
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, 'rb')  # pylint: disable=consider-using-with
+        try:
+            header = self._file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise HenoiFileError('file too short')
+            magic, version, bits, start_pos, end_pos, level, count, crc = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION or bits not in {3, 8}:
+                raise HenoiFileError('not a move file')
+            self.level, self.start_pos, self.end_pos = level, start_pos, end_pos
+            self.bits, self._count, self.crc = bits, count, crc
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self._payload = memoryview(self._map)[HEADER.size:]
+        if len(self._payload) < self._payload_size(count):
+            self.close()
+            raise HenoiFileError('file truncated')
+
+    def _payload_size(self, count: int) -> int:
+        return count if self.bits == 8 else (count+7)//8*3
+
+    def __len__(self) -> int:
+        return self._count
+
+    def code(self, step: int) -> int:
+        '''the packed code of the move on the step'''
+        if step < 0:
+            step += self._count
+        if not 0 <= step < self._count:
+            raise HenoiStepOver('over than all step')
+        if self.bits == 8:
+            return self._payload[step]
+        group = step//8*3
+        return (int.from_bytes(self._payload[group:group+3], 'little') >> (step % 8*3)) & 7
+
+    def codes(self, start: int = 0, stop: int | None = None) -> MoveBuffer:
+        '''decode the moves from start till stop'''
+        start, stop, _ = slice(start, stop).indices(self._count)
+        if start >= stop:
+            return MoveBuffer()
+        if self.bits == 8:
+            return MoveBuffer(self._payload[start:stop])
+        first = start//8
+        unpacked = unpack3(self._payload[first*3:(stop+7)//8*3])
+        return MoveBuffer(unpacked[start-first*8:stop-first*8])
+
+    @overload
+    def __getitem__(self, index: int) -> Movement: ...
+    @overload
+    def __getitem__(self, index: slice) -> MoveBuffer: ...
+
+    def __getitem__(self, index: int | slice) -> Movement | MoveBuffer:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step == 1:
+                return self.codes(start, stop)
+            if step > 0:
+                return self.codes(start, stop)[::step]
+            return self.codes(stop+1, start+1)[::step]
+        return Movement.from_code(self.code(index))
+
+    def to_movements(self, start: int = 0, stop: int | None = None) -> MoveGen:
+        '''decode Movements from start till stop, a chunk at a time'''
+        start, stop, _ = slice(start, stop).indices(self._count)
+        for index in range(start, stop, CHUNK):
+            yield from self.codes(index, min(index+CHUNK, stop))
+
+    def view(self) -> memoryview:
+        '''a zero-copy view of the codes, only for 8 bits files'''
+        if self.bits != 8:
+            raise HenoiFileError('only 8 bits files can be viewed')
+        return self._payload[:self._count]
+
+    def verify(self) -> bool:
+        '''check the crc32 of the payload'''
+        crc = 0
+        size = self._payload_size(self._count)
+        for index in range(0, size, CHUNK):
+            crc = zlib.crc32(self._payload[index:min(index+CHUNK, size)], crc)
+        return crc == self.crc
+
+    def close(self) -> None:
+        '''release the map and the file'''
+        self._payload.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+# PART test
+
+
+def __test() -> None:
+    '''Round-trip moves through files of both widths, written at once and in pieces'''
+    # pylint: disable=import-outside-toplevel
+    import os
+    import tempfile
+    from . import _moves
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'moves.hanoi')
+        for level in (1, 3, 5, 8):
+            expected = list(_moves(level))
+            for bits in (8, 3):
+                assert write_moves(path, _moves(level), level, bits=bits) == len(expected)
+                with MoveFile(path) as file:
+                    assert list(file.to_movements()) == expected, (level, bits)
+                    assert file.verify(), (level, bits)
+                with MoveFileWriter(path, level, bits=bits) as writer:
+                    for index in range(0, len(expected), 5):
+                        writer.write(expected[index:index+5])
+                with MoveFile(path) as file:
+                    assert list(file.to_movements()) == expected, (level, bits, 'pieces')
+    print('move files round-trip')
+
+
+if __name__ == '__main__':
+    __test()
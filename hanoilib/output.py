@@ -0,0 +1,61 @@
+'''Raw output straight to a file descriptor, past the text layer and colorama'''
+import os
+from typing import Self
+
+BUFFER_SIZE = 1 << 16
+'''bytes gathered before writing them out at once'''
+
+IOV_MAX = 1024
+'''buffers passed to one os.writev'''
+
+HAS_WRITEV = hasattr(os, 'writev')
+
+
+class RawWriter:
+    '''Gather writes and pass them to the file descriptor with os.writev (or os.write)'''
+    __slots__ = ('fd', 'size', '_chunks', '_pending')
+    fd: int
+    size: int
+    _chunks: list[bytes]
+    _pending: int
+
+    def __init__(self, fd: int = 1, size: int = BUFFER_SIZE) -> None:
+        self.fd, self.size = fd, size
+        self._chunks = []
+        self._pending = 0
+
+    def write(self, data: bytes | str) -> int:
+        '''buffer the data, str is encoded as utf-8'''
+        if isinstance(data, str):
+            data = data.encode()
+        self._chunks.append(data)
+        self._pending += len(data)
+        if self._pending >= self.size or len(self._chunks) >= IOV_MAX:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        '''write out all buffered data'''
+        chunks, total = self._chunks, self._pending
+        if not chunks:
+            return
+        self._chunks, self._pending = [], 0
+        written = 0
+        if len(chunks) > 1 and HAS_WRITEV:
+            written = os.writev(self.fd, chunks)
+            if written == total:
+                return
+        # a single chunk, or the rest of a partial write
+        view = memoryview(b''.join(chunks))[written:]
+        while view:
+            view = view[os.write(self.fd, view):]
+
+    def close(self) -> None:
+        '''flush, the descriptor is left open'''
+        self.flush()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.flush()
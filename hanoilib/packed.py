@@ -0,0 +1,311 @@
+'''Packed representations of henoi moves, one byte per move'''
+# pylint: disable=protected-access
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, Iterator, Self, SupportsIndex, overload
+from . import CODE_MOVES, CODE_PAIRS, MOVE_CODES, STACK_TYPES, HenoiImposible, HenoiOrderFail, \
+    MoveGen, Movement, Plate, Pos, Position, Tower, _move, positions_at
+
+
+# PART move code
+
+
+def move_code(from_: Position, to: Position, /) -> int:
+    '''Pack a movement into a byte: (0, 1) -> 0, (0, 2) -> 1, ... (2, 1) -> 5'''
+    return from_*2 + to - (to > from_)
+
+
+def peg_table(perm: tuple[Position, Position, Position], /) -> bytes:
+    '''A bytes.translate table relabelling pegs: peg p becomes perm[p]'''
+    table = bytearray(range(256))
+    for code, (from_, to) in enumerate(CODE_PAIRS):
+        table[code] = move_code(perm[from_], perm[to])
+    return bytes(table)
+
+
+SWAP_TEMP_END = peg_table((0, 2, 1))
+
+SWAP_START_TEMP = peg_table((1, 0, 2))
+
+
+# PART block
+
+BLOCK_CACHE_SIZE = 16
+
+BLOCK_LEVEL = 20
+'''Level of the largest block move_blocks yields, 2**20 - 1 bytes'''
+
+
+@lru_cache(maxsize=BLOCK_CACHE_SIZE)
+def _canonical_block(level: int) -> bytes:
+    '''All moves of the level from position a to c'''
+    if level <= 1:
+        return bytes((move_code(0, 2),)) if level else b''
+    half = _canonical_block(level-1)
+    # a -> b with the smaller tower, move the largest plate, b -> c with the smaller tower
+    return b''.join((
+        half.translate(SWAP_TEMP_END),
+        bytes((move_code(0, 2),)),
+        half.translate(SWAP_START_TEMP)
+    ))
+
+
+@lru_cache(maxsize=BLOCK_CACHE_SIZE)
+def _block(level: int, start_pos: Position, end_pos: Position) -> bytes:
+    if (start_pos, end_pos) == (0, 2):
+        return _canonical_block(level)
+    temp_pos: Position = (start_pos | end_pos) ^ 3  # type: ignore
+    return _canonical_block(level).translate(peg_table((start_pos, temp_pos, end_pos)))
+
+
+def move_block(level: int, *, start_pos: Position = 0, end_pos: Position = 2) -> memoryview:
+    '''All moves of the level packed one byte per move, built by doubling cached blocks'''
+    return memoryview(_block(level, start_pos, end_pos))
+
+
+def chunk_count(level: int) -> int:
+    '''How many chunks move_blocks splits the level into'''
+    return 1 << max(0, level-BLOCK_LEVEL)
+
+
+def move_blocks(level: int, *, start_pos: Position = 0, end_pos: Position = 2,
+                chunks: range | None = None) -> Iterator[memoryview]:
+    '''All moves of the level as packed blocks of at most 2**BLOCK_LEVEL moves. '''\
+        '''Chunk k starts at step k * 2**BLOCK_LEVEL, chunks selects part of them'''
+    if chunks is None:
+        chunks = range(chunk_count(level))
+    if level <= BLOCK_LEVEL:
+        if 0 in chunks:
+            yield move_block(level, start_pos=start_pos, end_pos=end_pos)
+        return
+    first = CODE_PAIRS[_block(BLOCK_LEVEL, 0, 2)[0]]
+    size = 1 << BLOCK_LEVEL
+    last = chunk_count(level)-1
+    for chunk in chunks:
+        # every chunk moves the top BLOCK_LEVEL plates from one position to another,
+        # which is the cached block relabelled to match its first move
+        from_, to = _move(chunk*size, level, start_pos=start_pos, end_pos=end_pos)
+        perm = [0, 0, 0]
+        perm[first[0]], perm[first[1]] = from_, to
+        perm[(first[0] | first[1]) ^ 3] = (from_ | to) ^ 3
+        yield move_block(BLOCK_LEVEL, start_pos=perm[0], end_pos=perm[2])  # type: ignore
+        if chunk < last:
+            joint = _move((chunk+1)*size-1, level, start_pos=start_pos, end_pos=end_pos)
+            yield memoryview(bytes((move_code(*joint),)))
+
+
+# PART buffer
+
+
+class MoveBuffer(bytearray):
+    '''Movements packed one byte each, which supports the buffer protocol'''
+
+    @classmethod
+    def from_moves(cls, moves: Iterable[tuple[Position, Position]]) -> Self:
+        '''Pack Movements, e.g. from any MoveGen'''
+        return cls(map(MOVE_CODES.__getitem__, moves))
+
+    @classmethod
+    def solution(cls, level: int, *, start_pos: Position = 0, end_pos: Position = 2) -> Self:
+        '''All moves of the level'''
+        buffer, index = cls((1 << level)-1), 0
+        for block in move_blocks(level, start_pos=start_pos, end_pos=end_pos):
+            buffer[index:index+len(block)] = block
+            index += len(block)
+        return buffer
+
+    @overload  # type: ignore[override]
+    def __getitem__(self, index: SupportsIndex) -> Movement: ...
+    @overload
+    def __getitem__(self, index: slice) -> Self: ...
+
+    def __getitem__(self, index: SupportsIndex | slice) -> Movement | Self:
+        if isinstance(index, slice):
+            return self.__class__(super().__getitem__(index))
+        return CODE_MOVES[super().__getitem__(index)]
+
+    def __iter__(self) -> Iterator[Movement]:  # type: ignore
+        return map(CODE_MOVES.__getitem__, super().__iter__())
+
+    def __reversed__(self) -> Iterator[Movement]:  # type: ignore[override]
+        return map(CODE_MOVES.__getitem__, super().__getitem__(slice(None, None, -1)))
+
+    @overload  # type: ignore[override]
+    def __setitem__(self, index: SupportsIndex, move: tuple[Position, Position]) -> None: ...
+    @overload
+    def __setitem__(self, index: slice,
+                    moves: Iterable[tuple[Position, Position]] | memoryview) -> None: ...
+
+    def __setitem__(self, index, moves) -> None:  # type: ignore
+        if isinstance(index, slice):
+            super().__setitem__(index, _codes(moves))
+        else:
+            super().__setitem__(index, MOVE_CODES[moves])
+
+    def __contains__(self, move: object) -> bool:
+        return isinstance(move, tuple) and (code := MOVE_CODES.get(move)) is not None \
+            and super().__contains__(code)
+
+    def index(self, move: tuple[Position, Position], *args: SupportsIndex) -> int:  # type: ignore
+        '''The index of the first Movement'''
+        if (code := MOVE_CODES.get(move)) is None:
+            raise ValueError(f'{move!r} is not a movement')
+        return super().index(code, *args)
+
+    def count(self, move: tuple[Position, Position], *args: SupportsIndex) -> int:  # type: ignore
+        '''How many times the Movement occurs'''
+        if (code := MOVE_CODES.get(move)) is None:
+            return 0
+        return super().count(code, *args)
+
+    def append(self, move: tuple[Position, Position], /) -> None:  # type: ignore
+        '''Add a Movement into the end'''
+        super().append(MOVE_CODES[move])
+
+    def extend(self, moves: Iterable[tuple[Position, Position]], /) -> None:  # type: ignore
+        '''Add Movements into the end'''
+        super().extend(_codes(moves))
+
+    def insert(self, index: SupportsIndex,  # type: ignore
+               move: tuple[Position, Position], /) -> None:
+        '''Insert a Movement before the index'''
+        super().insert(index, MOVE_CODES[move])
+
+    def pop(self, index: int = -1, /) -> Movement:  # type: ignore
+        '''Remove and return the Movement at the index'''
+        return CODE_MOVES[super().pop(index)]
+
+    def remove(self, move: tuple[Position, Position], /) -> None:  # type: ignore
+        '''Remove the first Movement'''
+        del self[self.index(move)]
+
+    def copy(self) -> Self:
+        '''A shallow copy'''
+        return self.__class__(self)
+
+    def __add__(self, moves: Iterable[tuple[Position, Position]]) -> Self:  # type: ignore
+        return self.__class__(super().__add__(_codes(moves)))
+
+    def __radd__(self, moves: Iterable[tuple[Position, Position]]) -> Self:
+        if isinstance(moves, (bytes, bytearray, memoryview)):
+            # packed codes on the left are concatenated (or extended in place) by them
+            return NotImplemented
+        return self.__class__(bytes(map(MOVE_CODES.__getitem__, moves))+self)
+
+    def __iadd__(self, moves: Iterable[tuple[Position, Position]]) -> Self:  # type: ignore
+        self.extend(moves)
+        return self
+
+    def __mul__(self, times: SupportsIndex) -> Self:
+        return self.__class__(super().__mul__(times))
+
+    __rmul__ = __mul__
+
+    def moves(self) -> MoveGen:
+        '''Read the Movements'''
+        yield from self
+
+    def view(self) -> memoryview:
+        '''A zero-copy view of the packed codes'''
+        return memoryview(self)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__} of {len(self)} moves>'
+
+    __str__ = __repr__
+
+
+def _codes(moves: Iterable[tuple[Position, Position]]) -> bytes | bytearray | memoryview:
+    '''packed codes of the Movements, packed codes are taken as they are'''
+    if isinstance(moves, (bytes, bytearray, memoryview)):
+        return moves
+    return bytes(map(MOVE_CODES.__getitem__, moves))
+
+
+# PART tower
+
+
+@dataclass(slots=True, frozen=True)
+class PackedTower:
+    '''A hashable tower packed into one integer, '''\
+        '''the position of plate k is at bits 2k-2 and 2k-1'''
+    level: int
+    state: int
+    masks: tuple[int, int, int] = field(default=(0, 0, 0), compare=False, repr=False)
+    '''plates on each position, plate k is bit k-1'''
+
+    def __post_init__(self) -> None:
+        if self.level and not any(self.masks):
+            masks = [0, 0, 0]
+            state = self.state
+            for bit in range(self.level):
+                masks[(state >> (bit << 1)) & 3] |= 1 << bit
+            object.__setattr__(self, 'masks', tuple(masks))
+
+    def top(self, p: Position, /) -> int:
+        '''the top plate at the position, 0 if there is none'''
+        mask = self.masks[p]
+        return (mask & -mask).bit_length()
+
+    def move(self, movement: tuple[Position, Position]) -> Self:
+        '''Move a plate, if possible, return the new tower'''
+        from_, to = movement
+        masks = list(self.masks)
+        low = masks[from_] & -masks[from_]
+        if not low:
+            raise HenoiImposible(f'no plate at {Pos.to_chr(from_)}')
+        if masks[to] & (low-1):
+            raise HenoiOrderFail(f'{low.bit_length()} >= {self.top(to)}')
+        masks[from_] ^= low
+        masks[to] |= low
+        return self.__class__(
+            self.level,
+            self.state ^ ((from_ ^ to) << ((low.bit_length()-1) << 1)),
+            tuple(masks))  # type: ignore
+
+    def legal_moves(self) -> list[Movement]:
+        '''all possible movements'''
+        tops = [self.top(p) or self.level+1 for p in (0, 1, 2)]
+        return [move for move in CODE_MOVES if tops[move[0]] < tops[move[1]]]
+
+    def positions(self) -> bytes:
+        '''positions of plates from the largest one, like Tower.plates_pos'''
+        state = self.state
+        return bytes((state >> (bit << 1)) & 3 for bit in range(self.level-1, -1, -1))
+
+    def to_tower(self, *, tower_name: str = '',
+                 stack_names: tuple[str, str, str] = ('', '', '')) -> Tower:
+        '''unpack into a Tower'''
+        stacks: tuple[list[Plate], list[Plate], list[Plate]] = ([], [], [])
+        for plate, pos in zip(range(self.level, 0, -1), self.positions()):
+            stacks[pos].append(Plate(plate))
+        return Tower(*(stack_type(stack, name, self.level)
+                       for stack_type, stack, name in zip(STACK_TYPES, stacks, stack_names)),
+                     name=tower_name)  # type: ignore
+
+    @classmethod
+    def from_positions(cls, positions: Iterable[int]) -> Self:
+        '''pack positions from the largest plate, like Tower.plates_pos'''
+        state = level = 0
+        masks = [0, 0, 0]
+        for pos in positions:
+            state = (state << 2) | pos
+            for p in (0, 1, 2):
+                masks[p] <<= 1
+            masks[pos] |= 1
+            level += 1
+        return cls(level, state, tuple(masks))  # type: ignore
+
+    @classmethod
+    def from_tower(cls, tower: Tower) -> Self:
+        '''pack a Tower'''
+        return cls.from_positions(tower.plates_pos)
+
+    @classmethod
+    def new(cls, step: int, level: int, *,
+            start_pos: Position = 0, end_pos: Position = 2) -> Self:
+        '''the tower on the step'''
+        return cls.from_positions(positions_at(step, level, start_pos=start_pos, end_pos=end_pos))
+
+    def __repr__(self) -> str:
+        return str.join('', map(Pos._to_chr, self.positions()))
@@ -0,0 +1,80 @@
+'''Generate henoi moves in parallel into shared memory'''
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import os
+from typing import Self
+from . import Movement, Position
+from .packed import BLOCK_LEVEL, MoveBuffer, chunk_count, move_blocks
+
+
+class SharedMoves:
+    '''Moves in shared memory, one byte per move, see hanoilib.packed for the codes'''
+    shm: SharedMemory
+    moves: memoryview
+
+    def __init__(self, shm: SharedMemory, length: int) -> None:
+        self.shm = shm
+        # the buffer is None only after close, and the memory is just opened
+        assert shm.buf is not None
+        self.moves = shm.buf[:length]
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __getitem__(self, step: int) -> Movement:
+        return Movement.from_code(self.moves[step])
+
+    def to_buffer(self) -> MoveBuffer:
+        '''copy the moves into a MoveBuffer'''
+        return MoveBuffer(self.moves)
+
+    def close(self) -> None:
+        '''release and remove the shared memory'''
+        self.moves.release()
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def _fill(name: str, level: int, start_pos: Position, end_pos: Position, chunks: range) -> None:
+    '''fill the chunks of the moves into the shared memory named name'''
+    shm = SharedMemory(name)
+    try:
+        buffer = shm.buf
+        assert buffer is not None
+        index = chunks.start << BLOCK_LEVEL
+        for block in move_blocks(level, start_pos=start_pos, end_pos=end_pos, chunks=chunks):
+            buffer[index:index+len(block)] = block
+            index += len(block)
+        del buffer
+    finally:
+        shm.close()
+
+
+def generate_parallel(level: int, workers: int | None = None, *,
+                      start_pos: Position = 0, end_pos: Position = 2) -> SharedMoves:
+    '''Generate all moves of the level with worker processes into shared memory'''
+    length = (1 << level)-1
+    shm = SharedMemory(create=True, size=max(length, 1))
+    chunks = chunk_count(level)
+    workers = min(workers or os.cpu_count() or 1, chunks)
+    bounds = [chunks*i//workers for i in range(workers+1)]
+    try:
+        if workers == 1:
+            _fill(shm.name, level, start_pos, end_pos, range(chunks))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                for _ in pool.map(_fill, *zip(*(
+                        (shm.name, level, start_pos, end_pos, range(begin, end))
+                        for begin, end in zip(bounds, bounds[1:])))):
+                    pass
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return SharedMoves(shm, length)
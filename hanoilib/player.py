@@ -0,0 +1,190 @@
+'''Play a Show at a rate with asyncio, scheduled against a monotonic clock and '''\
+    '''controlled by keys while playing'''
+import asyncio
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import os
+import sys
+from time import monotonic
+from typing import Any, Callable, Iterator, Protocol
+from . import HenoiStepOver
+from .display import Show
+
+KEYS = {
+    ' ': 'pause', 'p': 'pause',
+    '+': 'faster', '=': 'faster', 'f': 'faster',
+    '-': 'slower', 's': 'slower',
+    'n': 'step', '.': 'step',
+    'q': 'stop', '\x1b': 'stop',
+}
+'''keys and the actions of them'''
+
+KEYS_HELP = 'space: pause / resume, +: faster, -: slower, n: step, q: stop'
+
+SPEED_FACTOR = 2.
+
+
+class Output(Protocol):
+    '''Where the frames go, like sys.stdout or a RawWriter'''
+    def write(self, text: str, /) -> Any: ...
+    def flush(self) -> Any: ...
+
+
+@dataclass(slots=True)
+class PlayReport:
+    '''The requested and the achieved moves per second, the time paused is not counted'''
+    moves: int
+    requested: float
+    achieved: float
+    active: float
+    paused: float
+
+    def __str__(self) -> str:
+        return f'{self.moves} moves, requested {self.requested:.2f} moves/s, '\
+            f'achieved {self.achieved:.2f} moves/s'
+
+
+@dataclass(slots=True)
+class Player:
+    '''Play the show at rate moves a second, drawing at most fps frames a second. '''\
+        '''Moves are due by the time since the schedule began, so render cost does not drift '''\
+        '''the rate, and the moves due in one frame are drawn together'''
+    show: Show
+    out: Output
+    rate: float
+    fps: float = 60.
+    clock: Callable[[], float] = monotonic
+    paused: bool = False
+    _stop: bool = field(default=False, init=False)
+    _steps: int = field(default=0, init=False)
+    _origin: float = field(default=0., init=False)
+    _done: int = field(default=0, init=False)
+    _moves: int = field(default=0, init=False)
+    _scheduled: float = field(default=0., init=False)
+    _active: float = field(default=0., init=False)
+    _paused: float = field(default=0., init=False)
+    _wake: asyncio.Event | None = field(default=None, init=False)
+
+    def _rebase(self) -> None:
+        '''fold the running schedule into the totals and start a new one from now'''
+        now = self.clock()
+        if self.paused:
+            self._paused += now-self._origin
+        else:
+            self._active += now-self._origin
+            self._scheduled += (now-self._origin)*self.rate
+        self._origin, self._done = now, 0
+
+    def press(self, keys: str) -> None:
+        '''take the keys pressed'''
+        for key in keys:
+            match KEYS.get(key.lower()):
+                case 'pause':
+                    self._rebase()
+                    self.paused = not self.paused
+                case 'faster':
+                    self._rebase()
+                    self.rate *= SPEED_FACTOR
+                case 'slower':
+                    self._rebase()
+                    self.rate /= SPEED_FACTOR
+                case 'step':
+                    self._steps += 1
+                case 'stop':
+                    self._stop = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def _play(self, moves: int) -> bool:
+        '''play some moves and draw them as one frame, return False when finished'''
+        show = self.show
+        try:
+            for _ in range(moves):
+                show.next()
+                self._moves += 1
+        except HenoiStepOver:
+            return False
+        finally:
+            self.out.write(show.read_editions())
+            self.out.flush()
+        return True
+
+    async def run(self) -> PlayReport:
+        '''play till the end or stopped'''
+        wake = self._wake = asyncio.Event()
+        self._origin = self.clock()
+        frame = 1/self.fps
+        playing = True
+        while playing and not self._stop:
+            if self._steps:
+                steps, self._steps = self._steps, 0
+                if not (playing := self._play(steps)):
+                    break
+            if self.paused:
+                timeout = None
+            else:
+                now = self.clock()
+                if due := int((now-self._origin)*self.rate)-self._done:
+                    # two frames of moves at most to catch up, the rest are due in the next frames
+                    due = min(due, int(2*self.rate*frame)+1)
+                    self._done += due
+                    if not (playing := self._play(due)):
+                        break
+                    # the keys are taken while waiting, and frames are at most fps a second
+                    timeout = max(now+frame-self.clock(), 0.)
+                else:
+                    # sleep till the next move is due, but keep at most fps frames a second
+                    timeout = max(self._origin+(self._done+1)/self.rate-now, frame)
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._rebase()
+        self._wake = None
+        return PlayReport(
+            self._moves, self._scheduled/self._active if self._active else self.rate,
+            self._moves/self._active if self._active else 0., self._active, self._paused)
+
+
+@contextmanager
+def key_reader(loop: asyncio.AbstractEventLoop, on_keys: Callable[[str], Any]) -> Iterator[None]:
+    '''Pass the keys pressed to on_keys without waiting for enter, nothing if stdin is no tty'''
+    if not sys.stdin.isatty():
+        yield
+        return
+    if sys.platform == 'win32':
+        import msvcrt  # pylint: disable=import-outside-toplevel
+
+        async def poll() -> None:
+            while True:
+                while msvcrt.kbhit():
+                    on_keys(msvcrt.getwch())
+                await asyncio.sleep(.05)
+        task = loop.create_task(poll())
+        try:
+            yield
+        finally:
+            task.cancel()
+        return
+    import termios  # pylint: disable=import-outside-toplevel
+    import tty  # pylint: disable=import-outside-toplevel
+    fd = sys.stdin.fileno()
+    old = termios.tcgetattr(fd)
+    tty.setcbreak(fd)
+    loop.add_reader(fd, lambda: on_keys(os.read(fd, 32).decode(errors='ignore')))
+    try:
+        yield
+    finally:
+        loop.remove_reader(fd)
+        termios.tcsetattr(fd, termios.TCSADRAIN, old)
+
+
+async def _run(player: Player) -> PlayReport:
+    with key_reader(asyncio.get_running_loop(), player.press):
+        return await player.run()
+
+
+def play(show: Show, out: Output, rate: float, *, fps: float = 60.) -> PlayReport:
+    '''Play the show at rate moves a second, controlled by the keys of KEYS'''
+    return asyncio.run(_run(Player(show, out, rate, fps)))
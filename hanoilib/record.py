@@ -0,0 +1,122 @@
+'''Record a Show to an asciicast v2 file headless, timed by a virtual clock instead of sleeping'''
+import gzip
+import io
+import json
+import time
+from dataclasses import dataclass
+from typing import IO, Self
+from .display import Show
+from .screen import SGR
+
+BUFFER_SIZE = 1 << 16
+'''bytes gathered before writing them to the file (or the compressor)'''
+
+NEWLINE = '\r\n'
+'''a recorded terminal gets no translation of newlines, the carriage return is written'''
+
+
+class VirtualClock:
+    '''A clock of ticks step seconds apart, each reading is the next tick, '''\
+        '''time is the last one read'''
+    __slots__ = ('step', 'ticks', 'time')
+    step: float
+    ticks: int
+    time: float
+
+    def __init__(self, step: float) -> None:
+        self.step = step
+        self.ticks = 0
+        self.time = 0.
+
+    def __call__(self) -> float:
+        self.time = self.ticks*self.step
+        self.ticks += 1
+        return self.time
+
+
+class AsciicastWriter:
+    '''Write the header and then the output events of an asciicast v2 file, buffered'''
+    __slots__ = ('file', 'events', '_last')
+    file: IO[str]
+    events: int
+    _last: float
+
+    def __init__(self, file: IO[str], width: int, height: int, *, title: str | None = None,
+                 timestamp: int | None = None) -> None:
+        self.file = file
+        self.events = 0
+        self._last = 0.
+        header: dict = {
+            'version': 2, 'width': width, 'height': height,
+            'timestamp': int(time.time()) if timestamp is None else timestamp,
+            'env': {'TERM': 'xterm-256color'},
+        }
+        if title is not None:
+            header['title'] = title
+        file.write(json.dumps(header)+'\n')
+
+    @staticmethod
+    def open(path: str, width: int, height: int, *, compress: bool | None = None,
+             title: str | None = None) -> 'AsciicastWriter':
+        '''Write to the path, gzipped if compress (or if the path ends with .gz when None)'''
+        if compress is None:
+            compress = path.endswith('.gz')
+        raw: IO[bytes] = gzip.open(path, 'wb') if compress else open(path, 'wb')  # type: ignore
+        file = io.TextIOWrapper(io.BufferedWriter(raw, BUFFER_SIZE),  # type: ignore
+                                encoding='utf-8', newline='\n')
+        return AsciicastWriter(file, width, height, title=title)
+
+    def write(self, data: str, at: float | None = None) -> None:
+        '''an output event at the time (the time of the last event if None)'''
+        if at is not None:
+            self._last = at
+        # json floats are shortest repr, rounded to microseconds like asciinema
+        self.file.write(f'[{round(self._last, 6)}, "o", {json.dumps(data)}]\n')
+        self.events += 1
+
+    def close(self) -> None:
+        '''flush and close the file'''
+        self.file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+@dataclass(slots=True)
+class RecordReport:
+    '''What was recorded'''
+    events: int
+    duration: float
+    elapsed: float
+
+    def __str__(self) -> str:
+        return f'{self.events} events, {self.duration:.2f}s recorded in {self.elapsed:.3f}s'
+
+
+def frame_size(text: str) -> tuple[int, int]:
+    '''The columns and the rows of a frame, with a row for the cursor below'''
+    lines = text.split('\n')
+    return max(len(SGR.sub('', line)) for line in lines), len(lines)+1
+
+
+def record(show: Show, cast: AsciicastWriter | str, rate: float, *, fps: float = 30.,
+           compress: bool | None = None, title: str | None = None) -> RecordReport:
+    '''Record the show played to the end at rate moves a second, fps frames a second, '''\
+        '''the frame drawn first at 0. A path is opened with AsciicastWriter.open'''
+    start = time.perf_counter()
+    frame = str(show)
+    if isinstance(cast, str):
+        width, height = frame_size(frame)
+        cast = AsciicastWriter.open(cast, width, height, compress=compress, title=title)
+    clock = VirtualClock(1/rate)
+    with cast:
+        cast.write(f'\x1b[H\x1b[2J{frame.replace(chr(10), NEWLINE)}{NEWLINE}', 0.)
+        write = cast.write
+
+        def on_frame(text: str) -> None:
+            write(text, clock.time)
+        show.fast_play(on_frame, fps=fps, clock=clock)
+    return RecordReport(cast.events, clock.time, time.perf_counter()-start)
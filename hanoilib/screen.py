@@ -0,0 +1,179 @@
+'''A model of the frame last written to the terminal, to write only what a new frame changes'''
+import re
+from typing import Iterable
+
+Style = tuple[str, str, str]
+'''SGR parameters of the foreground, the background and the other attributes'''
+
+Cell = tuple[str, Style]
+
+PLAIN: Style = ('', '', '')
+
+BLANK: Cell = (' ', PLAIN)
+
+SGR = re.compile(r'\x1b\[([0-9;]*)m')
+
+GAP = 4
+'''unchanged cells between two changed runs written over instead of moving the cursor'''
+
+
+def apply_sgr(style: Style, params: str) -> Style:
+    '''the style after the SGR parameters'''
+    fg, bg, attrs = style
+    codes = params.split(';') if params else ['0']
+    index = 0
+    while index < len(codes):
+        code = codes[index] or '0'
+        if code in {'38', '48'}:
+            # 256 colors (5;n) or true colors (2;r;g;b)
+            width = 3 if codes[index+1:index+2] == ['5'] else 5
+            ext = ';'.join(codes[index:index+width])
+            index += width
+            if code == '38':
+                fg = ext
+            else:
+                bg = ext
+            continue
+        value = int(code)
+        if value == 0:
+            fg = bg = attrs = ''
+        elif 30 <= value <= 37 or 90 <= value <= 97:
+            fg = code
+        elif value == 39:
+            fg = ''
+        elif 40 <= value <= 47 or 100 <= value <= 107:
+            bg = code
+        elif value == 49:
+            bg = ''
+        elif code not in attrs.split(';'):
+            attrs = f'{attrs};{code}' if attrs else code
+        index += 1
+    return fg, bg, attrs
+
+
+def parse_line(line: str, style: Style = PLAIN) -> tuple[list[Cell], Style]:
+    '''split a line into cells, return the cells and the style at the end'''
+    cells: list[Cell] = []
+    add = cells.append
+    start = 0
+    for match in SGR.finditer(line):
+        for char in line[start:match.start()]:
+            add((char, style))
+        style = apply_sgr(style, match[1])
+        start = match.end()
+    for char in line[start:]:
+        add((char, style))
+    return cells, style
+
+
+def sgr(style: Style) -> str:
+    '''the escape to set the style from any style'''
+    params = ';'.join(param for param in ('0', *style) if param)
+    return f'\x1b[{params}m'
+
+
+class Screen:
+    '''The cells of the frame last written, from the top left of the terminal'''
+    __slots__ = ('_rows', '_lines')
+    _rows: list[list[Cell]] | None
+    _lines: list[str] | None
+    '''the lines shown but not parsed yet, most frames shown are never diffed'''
+
+    def __init__(self) -> None:
+        self._rows = None
+        self._lines = None
+
+    @property
+    def rows(self) -> list[list[Cell]] | None:
+        '''the cells of the frame, None if unknown'''
+        if self._lines is not None:
+            self._rows, self._lines = self.parse(self._lines), None
+        return self._rows
+
+    def invalidate(self) -> None:
+        '''forget the frame, the next one is written whole'''
+        self._rows = self._lines = None
+
+    @staticmethod
+    def parse(lines: Iterable[str]) -> list[list[Cell]]:
+        '''the cells of the lines, a style is carried over to the next line like a terminal'''
+        rows = []
+        style = PLAIN
+        for line in lines:
+            cells, style = parse_line(line, style)
+            rows.append(cells)
+        return rows
+
+    def shown(self, lines: Iterable[str]) -> None:
+        '''take the lines as written to the terminal by other means'''
+        self._rows, self._lines = None, list(lines)
+
+    def frame(self, lines: Iterable[str]) -> str:
+        '''the escapes to turn the last frame into the lines, the cursor is kept'''
+        rows = self.parse(lines)
+        old_rows, self._rows = self.rows, rows
+        if old_rows is None or len(old_rows) != len(rows):
+            return self._whole(rows)
+        parts: list[str] = []
+        style = PLAIN
+        for number, (old, new) in enumerate(zip(old_rows, rows), 1):
+            if old != new:
+                text, style = _diff_row(number, old, new, style)
+                parts.append(text)
+        if not parts:
+            return ''
+        return f'\x1b[s\x1b[0m{"".join(parts)}\x1b[0m\x1b[u'
+
+    @staticmethod
+    def _whole(rows: list[list[Cell]]) -> str:
+        parts = ['\x1b[0m\x1b[H\x1b[2J']
+        style = PLAIN
+        for number, cells in enumerate(rows, 1):
+            text, style = _write_cells(cells, style)
+            parts.append(f'\x1b[{number};1H{text}')
+        parts.append(f'\x1b[0m\x1b[{len(rows)+1};1H')
+        return ''.join(parts)
+
+
+def _write_cells(cells: Iterable[Cell], style: Style) -> tuple[str, Style]:
+    '''the text of the cells from the style, return the text and the style at the end'''
+    parts = []
+    for char, cell_style in cells:
+        if cell_style != style:
+            parts.append(sgr(cell_style))
+            style = cell_style
+        parts.append(char)
+    return ''.join(parts), style
+
+
+def _diff_row(number: int, old: list[Cell], new: list[Cell], style: Style) -> tuple[str, Style]:
+    '''the escapes to turn the old row into the new one from the style, '''\
+        '''return the escapes and the style at the end'''
+    width = max(len(old), len(new))
+    old = old+[BLANK]*(width-len(old))
+    new_cells = new+[BLANK]*(width-len(new))
+    changed = [col for col in range(width) if old[col] != new_cells[col]]
+    if not changed:
+        return '', style
+    # the trailing blanks of the new row are erased instead of written
+    end = len(new)
+    while end and new[end-1] == BLANK:
+        end -= 1
+    parts = []
+    index = 0
+    while index < len(changed) and changed[index] < end:
+        start = stop = changed[index]
+        # merge the runs with short gaps between
+        while index+1 < len(changed) and changed[index+1] < end \
+                and changed[index+1]-stop <= GAP:
+            index += 1
+            stop = changed[index]
+        index += 1
+        text, style = _write_cells(new_cells[start:stop+1], style)
+        parts.append(f'\x1b[{number};{start+1}H{text}')
+    if changed[-1] >= end:
+        if style != PLAIN:
+            parts.append('\x1b[0m')
+            style = PLAIN
+        parts.append(f'\x1b[{number};{end+1}H\x1b[K')
+    return ''.join(parts), style
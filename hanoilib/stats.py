@@ -0,0 +1,176 @@
+'''Counters and timers to profile playing, installed only when profiling is on'''
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import json
+import os
+from time import perf_counter_ns
+from typing import Any, Callable, Iterator, TypeVar
+from . import Movement
+from ._show import FutureMoves
+
+PROFILE_ENV = 'HANOI_PROFILE'
+
+PHASES = ('generate', 'edit', 'encode', 'write')
+'''move generation, edit building, ANSI encoding and terminal writes'''
+
+T = TypeVar('T')
+
+
+def profiling_enabled(flag: bool = False) -> bool:
+    '''Whether to profile, by the flag or the environment variable HANOI_PROFILE'''
+    return flag or os.environ.get(PROFILE_ENV, '').lower() not in {'', '0', 'false', 'no'}
+
+
+@dataclass(slots=True)
+class PlayStats:
+    '''Time spent in each phase (exclusive of nested phases) and the counters of playing'''
+    timers: dict[str, int] = field(default_factory=lambda: dict.fromkeys(PHASES, 0))
+    calls: dict[str, int] = field(default_factory=lambda: dict.fromkeys(PHASES, 0))
+    moves: int = 0
+    bytes_out: int = 0
+    refills: int = 0
+    wall: int = 0
+    _running: list[list[Any]] = field(default_factory=list, repr=False)
+
+    def enter(self, phase: str) -> None:
+        '''start timing the phase, pausing the running one'''
+        now = perf_counter_ns()
+        if self._running:
+            # pause the outer phase
+            outer = self._running[-1]
+            self.timers[outer[0]] += now-outer[1]
+        self._running.append([phase, now])
+        self.calls[phase] += 1
+
+    def leave(self) -> None:
+        '''stop timing the latest phase'''
+        now = perf_counter_ns()
+        phase, start = self._running.pop()
+        self.timers[phase] += now-start
+        if self._running:
+            self._running[-1][1] = now
+
+    def timed(self, phase: str, func: Callable[..., T]) -> Callable[..., T]:
+        '''wrap the function to count its time into the phase'''
+        enter, leave = self.enter, self.leave
+
+        def wrapper(*args, **kwargs) -> T:
+            enter(phase)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                leave()
+        return wrapper
+
+    def timed_moves(self, moves: Iterator[Movement]) -> Iterator[Movement]:
+        '''wrap moves to count them and the time generating them'''
+        enter, leave = self.enter, self.leave
+        while True:
+            enter('generate')
+            try:
+                move = next(moves)
+            except StopIteration:
+                return
+            finally:
+                leave()
+            self.moves += 1
+            yield move
+
+    def emit(self, write: Callable[[Any], Any], text: str | bytes) -> None:
+        '''write the text (or bytes), counting the time and the bytes'''
+        self.bytes_out += len(text) if isinstance(text, bytes) else len(text.encode())
+        self.enter('write')
+        try:
+            write(text)
+        finally:
+            self.leave()
+
+    def writer(self, write: Callable[[Any], Any]) -> Callable[[Any], None]:
+        '''wrap a write function to count the time and the bytes'''
+        return lambda text: self.emit(write, text)
+
+    @contextmanager
+    def session(self) -> Iterator[None]:
+        '''count the wall time of playing'''
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.wall += perf_counter_ns()-start
+
+    def reset(self) -> None:
+        '''clear all counters'''
+        self.timers = dict.fromkeys(PHASES, 0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.moves = self.bytes_out = self.refills = self.wall = 0
+
+    def summary(self) -> dict[str, Any]:
+        '''the counters as a dict'''
+        spent = self.wall or sum(self.timers.values())
+        return {
+            'moves': self.moves,
+            'moves_per_sec': self.moves*1e9/spent if spent else 0.,
+            'bytes_out': self.bytes_out,
+            'bytes_per_move': self.bytes_out/self.moves if self.moves else 0.,
+            'refills': self.refills,
+            'wall_sec': self.wall/1e9,
+            'phases': {phase: {'sec': self.timers[phase]/1e9, 'calls': self.calls[phase]}
+                       for phase in PHASES},
+        }
+
+    def report(self) -> str:
+        '''the counters as a table'''
+        info = self.summary()
+        total = sum(self.timers.values()) or 1
+        timers = self.timers
+        lines = [f'{phase:<10}{timers[phase]/1e6:>12.3f} ms{timers[phase]*100/total:>7.1f} %'
+                 f'{self.calls[phase]:>10} calls' for phase in PHASES]
+        lines.append(f'moves     {info["moves"]:>12} ({info["moves_per_sec"]:.1f} moves/s)')
+        lines.append(f'bytes     {info["bytes_out"]:>12} ({info["bytes_per_move"]:.1f} per move)')
+        lines.append(f'refills   {info["refills"]:>12}')
+        return '\n'.join(lines)
+
+    def dump(self, path: str) -> None:
+        '''write the counters as json'''
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, indent=2)
+
+
+class ProfiledFutureMoves(FutureMoves):
+    '''FutureMoves counting the time and the refills from the generator'''
+    __slots__ = ('stats',)
+    stats: PlayStats
+
+    def __init__(self, moves: FutureMoves, stats: PlayStats) -> None:
+        super().__init__(moves.known, moves.unknown)
+        self.stats = stats
+
+    def calculate_till(self, steps: int) -> int:
+        if self.unknown is None or len(self.known) >= steps:
+            return len(self.known)
+        self.stats.refills += 1
+        self.stats.enter('generate')
+        try:
+            return super().calculate_till(steps)
+        finally:
+            self.stats.leave()
+
+    def __next__(self) -> Movement:
+        if self.known or self.unknown is None:
+            return super().__next__()
+        self.stats.refills += 1
+        self.stats.enter('generate')
+        try:
+            return super().__next__()
+        finally:
+            self.stats.leave()
+
+    def __bool__(self) -> bool:
+        if self.known or self.unknown is None:
+            return bool(self.known)
+        self.stats.refills += 1
+        self.stats.enter('generate')
+        try:
+            return super().__bool__()
+        finally:
+            self.stats.leave()